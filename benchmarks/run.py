@@ -0,0 +1,299 @@
+"""Throughput benchmarks for the VideMon download engine
+
+Runs the real DownloadEngine against a local stand-in media server
+(server.py) with a stub yt-dlp extractor (yt_dlp_plugins/), so no network
+access is needed. Each workload runs in a fresh process, making its CPU
+time and peak RSS its own. Results are saved as JSON in
+benchmarks/results/ and compared with the previous run.
+
+    python benchmarks/run.py
+    python benchmarks/run.py --workloads single,parallel --size 128
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+import tempfile
+import shutil
+import statistics
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+MIB = 1024 * 1024
+
+WORKLOADS = ('single', 'fragmented', 'parallel', 'playlist')
+
+# Metrics compared between runs, and whether higher values are better
+METRICS = {
+    'fetch_info_s': False,
+    'ttfb_s': False,
+    'mb_per_s': True,
+    'cpu_percent': False,
+    'peak_rss_mb': False,
+}
+
+def run_workload(spec):
+    """Run one workload in this process and return its measurements"""
+    sys.path.insert(0, REPO_DIR)
+    import resource
+    from videmon.engine import DownloadEngine
+    from videmon.jobs import DownloadJob
+    from videmon.formats import FormatPolicy
+    
+    timings = {}  # job id -> perf_counter marks
+    
+    class TimedEngine(DownloadEngine):
+        def download_content(self, job):
+            timings[job.id] = {'start': time.perf_counter()}
+            try:
+                super().download_content(job)
+            finally:
+                timings[job.id]['end'] = time.perf_counter()
+        
+        def progress_hook(self, job, d):
+            if d['status'] == 'downloading' and d.get('downloaded_bytes'):
+                timings[job.id].setdefault('first_byte', time.perf_counter())
+            super().progress_hook(job, d)
+    
+    workdir = tempfile.mkdtemp(prefix='videmon-bench-')
+    try:
+        engine = TimedEngine(os.path.join(workdir, 'data'))
+        engine.settings.update({
+            'path': os.path.join(workdir, 'downloads'),
+            'fragments': str(spec['fragments']),
+            'chunk_size': '0',
+            'bandwidth_limit': '0'
+        })
+        engine.download_queue.set_max_workers(spec['jobs'])
+        
+        base_url, size, workload = spec['base_url'], spec['size'], spec['workload']
+        quality = {'format_id': 'best', 'resolution': 'best'}
+        fetch_info_s = None
+        
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        if workload in ('single', 'fragmented'):
+            kind = 'progressive' if workload == 'single' else 'fragmented'
+            url = f'{base_url}/watch?v={kind}-{size}-1'
+            engine.fetch_info(url)
+            fetch_info_s = time.perf_counter() - wall_start
+            engine.submit(url, quality, 'mp4')
+        elif workload == 'parallel':
+            for n in range(1, spec['jobs'] + 1):
+                engine.submit(f'{base_url}/watch?v=progressive-{size}-{n}', quality, 'mp4')
+        else:
+            engine.submit_playlist(f'{base_url}/playlist?list=progressive-{size}-{spec["entries"]}', FormatPolicy(), 'mp4')
+        
+        while engine.busy():
+            time.sleep(0.01)
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        
+        jobs = engine.download_queue.snapshot()
+        marks = [timings[job.id] for job in jobs if job.id in timings]
+        first_bytes = [m['first_byte'] for m in marks if 'first_byte' in m]
+        ttfbs = [m['first_byte'] - m['start'] for m in marks if 'first_byte' in m]
+        window = max(m['end'] for m in marks) - min(first_bytes) if first_bytes else 0
+        total_bytes = engine.history.total_bytes
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss *= 1 if sys.platform == 'darwin' else 1024  # macOS reports bytes, Linux KiB
+    
+    return {
+        'jobs': len(jobs),
+        'failed': [job.error for job in jobs if job.state == DownloadJob.FAILED],
+        'bytes': total_bytes,
+        'wall_s': wall,
+        'fetch_info_s': fetch_info_s,
+        'ttfb_s': sum(ttfbs) / len(ttfbs) if ttfbs else None,
+        'mb_per_s': total_bytes / MIB / window if window > 0 else None,
+        'cpu_percent': cpu * 100 / wall if wall > 0 else None,
+        'peak_rss_mb': peak_rss / MIB
+    }
+
+def start_server(latency):
+    """Start server.py in its own process; returns (process, base URL)"""
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(BENCH_DIR, 'server.py'), '--latency', str(latency)],
+        stdout=subprocess.PIPE,
+        text=True
+    )
+    line = process.stdout.readline()
+    if not line.startswith('PORT '):
+        process.kill()
+        raise RuntimeError("Benchmark server failed to start")
+    return process, f'http://127.0.0.1:{int(line.split()[1])}'
+
+def run_isolated(spec, timeout):
+    """Run a workload in a fresh interpreter and return its measurements"""
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--worker', json.dumps(spec)],
+        capture_output=True,
+        text=True,
+        timeout=timeout
+    )
+    lines = result.stdout.strip().splitlines()
+    if result.returncode != 0 or not lines:
+        raise RuntimeError(f"Workload {spec['workload']} crashed:\n{result.stderr[-2000:]}")
+    return json.loads(lines[-1])
+
+def median_run(runs):
+    """Merge repeated runs of a workload into per-metric medians"""
+    merged = dict(runs[0])
+    for key, value in runs[0].items():
+        if isinstance(value, (int, float)):
+            values = [run[key] for run in runs if run.get(key) is not None]
+            merged[key] = statistics.median(values) if values else None
+    merged['failed'] = [error for run in runs for error in run['failed']]
+    merged['runs'] = len(runs)
+    return merged
+
+def environment():
+    try:
+        from yt_dlp.version import __version__ as yt_dlp_version
+    except ImportError:
+        yt_dlp_version = None
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'yt_dlp': yt_dlp_version
+    }
+
+def previous_results():
+    """Return the most recent saved results, or None"""
+    try:
+        names = sorted(n for n in os.listdir(RESULTS_DIR) if n.endswith('.json'))
+    except OSError:
+        return None
+    for name in reversed(names):
+        try:
+            with open(os.path.join(RESULTS_DIR, name), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            continue
+    return None
+
+def save_results(results):
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{results['timestamp'].replace(':', '')}.json")
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+    return path
+
+def compare(previous, current, threshold):
+    """Return (rows, regressions) comparing every metric with the previous run"""
+    rows, regressions = [], []
+    for workload, metrics in current['workloads'].items():
+        before = previous['workloads'].get(workload)
+        if not before:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            old, new = before.get(metric), metrics.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            rows.append((workload, metric, old, new, change, worse > threshold))
+            if worse > threshold:
+                regressions.append(f"{workload} {metric}: {old:.3f} -> {new:.3f} ({change:+.1%})")
+    return rows, regressions
+
+def format_value(value):
+    return '-' if value is None else f'{value:.3f}'
+
+def print_report(results):
+    print(f"{'workload':<12}{'fetch s':>10}{'ttfb s':>10}{'MB/s':>10}{'cpu %':>10}{'rss MB':>10}{'wall s':>10}")
+    for workload, m in results['workloads'].items():
+        print(f"{workload:<12}{format_value(m['fetch_info_s']):>10}{format_value(m['ttfb_s']):>10}"
+              f"{format_value(m['mb_per_s']):>10}{format_value(m['cpu_percent']):>10}"
+              f"{format_value(m['peak_rss_mb']):>10}{format_value(m['wall_s']):>10}")
+        for error in m['failed']:
+            print(f"  failed: {error}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark VideMon downloads against a local media server.")
+    parser.add_argument('--workloads', default=','.join(WORKLOADS),
+                        help=f"comma separated subset of {', '.join(WORKLOADS)}")
+    parser.add_argument('--size', type=int, default=32, help="size of each video in MiB")
+    parser.add_argument('--jobs', type=int, default=4, help="concurrent downloads (and videos in 'parallel')")
+    parser.add_argument('--entries', type=int, default=5, help="videos in the 'playlist' workload")
+    parser.add_argument('--fragments', type=int, default=4, help="parallel fragment downloads per job")
+    parser.add_argument('--latency', type=float, default=10.0, help="server delay before each response, in ms")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per workload; medians are reported")
+    parser.add_argument('--threshold', type=float, default=0.10, help="relative change reported as a regression")
+    parser.add_argument('--timeout', type=float, default=600, help="seconds allowed per workload")
+    parser.add_argument('--no-save', action='store_true', help="don't save this run's results")
+    parser.add_argument('--fail-on-regression', action='store_true', help="exit with status 1 on a regression")
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.worker:
+        print(json.dumps(run_workload(json.loads(args.worker))))
+        return 0
+    
+    workloads = [w.strip() for w in args.workloads.split(',') if w.strip()]
+    unknown = set(workloads) - set(WORKLOADS)
+    if unknown:
+        print(f"Unknown workloads: {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+    
+    params = {
+        'size': args.size,
+        'jobs': args.jobs,
+        'entries': args.entries,
+        'fragments': args.fragments,
+        'latency': args.latency,
+        'repeat': args.repeat
+    }
+    results = {
+        'timestamp': datetime.now().strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': environment(),
+        'params': params,
+        'workloads': {}
+    }
+    
+    server, base_url = start_server(args.latency)
+    try:
+        for workload in workloads:
+            spec = dict(params, workload=workload, base_url=base_url)
+            runs = [run_isolated(spec, args.timeout) for _ in range(max(1, args.repeat))]
+            results['workloads'][workload] = median_run(runs)
+    finally:
+        server.terminate()
+        server.wait()
+    
+    print_report(results)
+    
+    previous = previous_results()
+    regressions = []
+    if previous is None:
+        print("\nNo previous results to compare with.")
+    elif previous.get('params') != params:
+        print(f"\nPrevious run ({previous['timestamp']}) used different parameters; not compared.")
+    else:
+        rows, regressions = compare(previous, results, args.threshold)
+        print(f"\nCompared with {previous['timestamp']}:")
+        for workload, metric, old, new, change, regressed in rows:
+            flag = '  REGRESSION' if regressed else ''
+            print(f"  {workload:<12}{metric:<14}{old:>10.3f} -> {new:<10.3f}{change:+8.1%}{flag}")
+    
+    if not args.no_save:
+        print(f"\nSaved {save_results(results)}")
+    
+    failed = any(m['failed'] for m in results['workloads'].values())
+    if failed or (regressions and args.fail_on_regression):
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""Local stand-in media server for the benchmarks
+
+Video IDs describe the synthetic media they stand for:
+``<kind>-<size in MiB>-<n>``, where kind is ``progressive`` (one file
+served with Range support) or ``fragmented`` (DASH-style segments).
+
+    /api/video/<id>            video metadata, read by the stub extractor
+    /api/playlist/<kind>-<size>-<count>
+                               playlist of `count` such videos
+    /media/<id>.mp4            progressive file
+    /frag/<id>/<index>.m4s     one fragment of a fragmented video
+
+Run standalone with ``python benchmarks/server.py``; the first line
+printed is ``PORT <port>``.
+"""
+import re
+import sys
+import json
+import time
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MIB = 1024 * 1024
+FRAGMENT_SIZE = 1 * MIB
+WRITE_SIZE = 256 * 1024
+MEDIA_ID_RE = re.compile(r'^(progressive|fragmented)-(\d+)-(\d+)$')
+
+# Repeating payload; its content doesn't matter to yt-dlp
+BLOCK = bytes(range(256)) * (WRITE_SIZE // 256)
+
+def parse_video_id(video_id):
+    """Return (kind, size in bytes) for a video ID, or None"""
+    match = MEDIA_ID_RE.match(video_id)
+    if not match:
+        return None
+    return match.group(1), int(match.group(2)) * MIB
+
+def video_metadata(base_url, video_id):
+    """The info the stub extractor turns into a yt-dlp info dict"""
+    kind, size = parse_video_id(video_id)
+    fmt = {
+        'format_id': kind,
+        'ext': 'mp4',
+        'vcodec': 'avc1.64001f',
+        'acodec': 'mp4a.40.2',
+        'width': 1280,
+        'height': 720,
+        'filesize': size,
+    }
+    if kind == 'progressive':
+        fmt['url'] = f'{base_url}/media/{video_id}.mp4'
+    else:
+        count = -(-size // FRAGMENT_SIZE)
+        fmt['protocol'] = 'http_dash_segments'
+        fmt['url'] = f'{base_url}/frag/{video_id}/manifest.mpd'
+        fmt['fragment_base_url'] = f'{base_url}/frag/{video_id}/'
+        fmt['fragments'] = [{'path': f'{index}.m4s', 'duration': 2.0} for index in range(count)]
+    return {'id': video_id, 'title': f'bench-{video_id}', 'duration': 60, 'formats': [fmt]}
+
+class MediaHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        path = self.path.split('?', 1)[0]
+        parts = [p for p in path.split('/') if p]
+        
+        if parts[:2] == ['api', 'video'] and len(parts) == 3 and parse_video_id(parts[2]):
+            self.send_json(video_metadata(self.base_url, parts[2]))
+        elif parts[:2] == ['api', 'playlist'] and len(parts) == 3 and MEDIA_ID_RE.match(parts[2]):
+            kind, size_mb, count = MEDIA_ID_RE.match(parts[2]).groups()
+            self.send_json({
+                'id': parts[2],
+                'title': f'bench-playlist-{parts[2]}',
+                'entries': [f'{kind}-{size_mb}-{n}' for n in range(1, int(count) + 1)]
+            })
+        elif parts[:1] == ['media'] and len(parts) == 2 and parse_video_id(parts[1][:-len('.mp4')]):
+            self.send_payload(parse_video_id(parts[1][:-len('.mp4')])[1])
+        elif parts[:1] == ['frag'] and len(parts) == 3 and parse_video_id(parts[1]):
+            size = parse_video_id(parts[1])[1]
+            try:
+                index = int(parts[2].split('.')[0])
+            except ValueError:
+                return self.send_error(404)
+            if not 0 <= index * FRAGMENT_SIZE < size:
+                return self.send_error(404)
+            self.send_payload(min(FRAGMENT_SIZE, size - index * FRAGMENT_SIZE))
+        else:
+            self.send_error(404)
+    
+    @property
+    def base_url(self):
+        return f'http://{self.headers.get("Host")}'
+    
+    def send_json(self, data):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def send_payload(self, size):
+        """Send `size` bytes of payload, honouring a single byte Range"""
+        start, end = 0, size - 1
+        match = re.match(r'bytes=(\d*)-(\d*)$', self.headers.get('Range') or '')
+        if match and (match.group(1) or match.group(2)):
+            if match.group(1):
+                start = int(match.group(1))
+                end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+            else:
+                start = max(0, size - int(match.group(2)))
+            if start > end:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        else:
+            self.send_response(200)
+        
+        length = end - start + 1
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(length))
+        self.end_headers()
+        
+        view = memoryview(BLOCK)
+        while length > 0:
+            chunk = min(length, WRITE_SIZE)
+            self.wfile.write(view[:chunk])
+            length -= chunk
+    
+    def log_message(self, format, *args):
+        pass
+
+def make_server(port=0, latency=0.0):
+    """Create the server on 127.0.0.1; latency is added before every response, in seconds"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), MediaHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    return server
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve synthetic media for the VideMon benchmarks.")
+    parser.add_argument('--port', type=int, default=0, help="port to listen on (default: any free port)")
+    parser.add_argument('--latency', type=float, default=0.0, help="delay before each response, in ms")
+    args = parser.parse_args(argv)
+    
+    server = make_server(args.port, args.latency / 1000)
+    print(f'PORT {server.server_address[1]}', flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,28 @@
+"""Stub extractors for the benchmark server's URLs
+
+yt-dlp loads this module as a plugin when the benchmarks folder is on
+sys.path, so the YoutubeDL instances created inside the engine resolve
+benchmark URLs locally without any change to the engine.
+"""
+from yt_dlp.extractor.common import InfoExtractor
+
+class VideMonBenchIE(InfoExtractor):
+    IE_NAME = 'videmon:bench'
+    _VALID_URL = r'(?P<base>https?://127\.0\.0\.1:\d+)/watch\?v=(?P<id>[a-z]+-\d+-\d+)'
+    
+    def _real_extract(self, url):
+        base, video_id = self._match_valid_url(url).group('base', 'id')
+        return self._download_json(f'{base}/api/video/{video_id}', video_id)
+
+class VideMonBenchPlaylistIE(InfoExtractor):
+    IE_NAME = 'videmon:bench:playlist'
+    _VALID_URL = r'(?P<base>https?://127\.0\.0\.1:\d+)/playlist\?list=(?P<id>[a-z]+-\d+-\d+)'
+    
+    def _real_extract(self, url):
+        base, playlist_id = self._match_valid_url(url).group('base', 'id')
+        playlist = self._download_json(f'{base}/api/playlist/{playlist_id}', playlist_id)
+        entries = [
+            self.url_result(f'{base}/watch?v={video_id}', VideMonBenchIE, video_id)
+            for video_id in playlist['entries']
+        ]
+        return self.playlist_result(entries, playlist_id, playlist['title'])
@@ -1,7 +1,10 @@
 import os
 import re
+import asyncio
 import threading
-import json
+import itertools
+import functools
+from collections import deque
 from kivy.app import App
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.textinput import TextInput
@@ -13,19 +16,62 @@ from kivy.uix.gridlayout import GridLayout
 from kivy.uix.popup import Popup
 from kivy.uix.spinner import Spinner
 from kivy.uix.carousel import Carousel
+from kivy.uix.filechooser import FileChooserListView
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.uix.behaviors import ButtonBehavior
+from kivy.properties import StringProperty, ListProperty, BooleanProperty, ObjectProperty
 from kivy.core.window import Window
 from kivy.clock import Clock
 from kivy.graphics import Color, Rectangle, RoundedRectangle
 from kivy.metrics import dp
-import yt_dlp as youtube_dl
 from pathlib import Path
 from datetime import datetime
 import webbrowser
 
+from videmon import (DownloadEngine, DownloadJob, FormatIndex, FormatPolicy, FormatRecord, Orchestrator,
+                     canonical_video_id, is_playlist_url)
+from videmon.batch import BatchItem
+from videmon.postprocess import DEFAULT_PROCESSORS
+from videmon.transfer import DEFAULT_FRAGMENTS, PROGRESS_RATE
+from videmon.utils import split_urls
+
 # Set window size for mobile emulation jj
 Window.size = (400, 700)
 Window.clearcolor = (0.96, 0.96, 0.96, 1)
 
+# Seconds without typing before a typed URL's info is fetched in the background
+PREFETCH_DELAY = 0.8
+
+# Activity log
+LOG_CAPACITY = 5000
+
+LOG_COLORS = {
+    "error": (0.8, 0.2, 0.2, 1),
+    "success": (0.2, 0.6, 0.2, 1),
+    "warning": (0.9, 0.6, 0.1, 1),
+    "info": (0.3, 0.3, 0.3, 1)
+}
+
+LOG_ICONS = {
+    "error": "❌",
+    "success": "✅",
+    "warning": "⚠️",
+    "info": "ℹ️"
+}
+
+# Queue list
+JOB_STATE_COLORS = {
+    DownloadJob.QUEUED: (0.6, 0.6, 0.6, 1),
+    DownloadJob.RUNNING: (0.1, 0.5, 0.8, 1),
+    DownloadJob.PAUSED: (0.8, 0.6, 0.2, 1),
+    DownloadJob.PROCESSING: (0.6, 0.4, 0.8, 1),
+    DownloadJob.DONE: (0.2, 0.6, 0.2, 1),
+    DownloadJob.FAILED: (0.8, 0.2, 0.2, 1),
+    DownloadJob.CANCELLED: (0.5, 0.5, 0.5, 1)
+}
+
 class StyledButton(Button):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -47,8 +93,252 @@ class StyledButton(Button):
         self.rect.pos = self.pos
         self.rect.size = self.size
 
+class LogRow(BoxLayout):
+    """Recycled activity log row; its properties are set from the log view data"""
+    timestamp = StringProperty('')
+    icon = StringProperty('')
+    message = StringProperty('')
+    color = ListProperty([0.3, 0.3, 0.3, 1])
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.spacing = dp(5)
+        
+        # Timestamp
+        self.time_label = Label(
+            size_hint_x=0.25,
+            font_size='10sp',
+            color=(0.4, 0.4, 0.4, 1)
+        )
+        self.add_widget(self.time_label)
+        
+        # Icon
+        self.icon_label = Label(
+            size_hint_x=0.1,
+            font_size='12sp'
+        )
+        self.add_widget(self.icon_label)
+        
+        # Message
+        self.msg_label = Label(
+            size_hint_x=0.65,
+            font_size='11sp',
+            halign='left',
+            shorten=True
+        )
+        self.msg_label.bind(size=self.msg_label.setter('text_size'))
+        self.add_widget(self.msg_label)
+        
+        self.bind(
+            timestamp=self.time_label.setter('text'),
+            icon=self.icon_label.setter('text'),
+            message=self.msg_label.setter('text'),
+            color=self.msg_label.setter('color')
+        )
+
+class QualityRow(RecycleDataViewBehavior, ButtonBehavior, BoxLayout):
+    """Recycled quality list row; selection comes from the row data"""
+    resolution = StringProperty('')
+    format_note = StringProperty('')
+    codec_text = StringProperty('')
+    codec_color = ListProperty([0.4, 0.4, 0.4, 1])
+    size_text = StringProperty('')
+    selected = BooleanProperty(False)
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.orientation = 'vertical'
+        self.padding = dp(5)
+        self.index = None
+        self.list_view = None
+        
+        with self.canvas.before:
+            self.bg_color = Color(0.95, 0.95, 0.95, 1)
+            self.bg_rect = Rectangle(pos=self.pos, size=self.size)
+        self.bind(pos=self.update_background, size=self.update_background)
+        
+        # Top row: Resolution and Format
+        top_row = BoxLayout(size_hint_y=0.4)
+        
+        resolution_label = Label(
+            font_size='14sp',
+            halign='left',
+            markup=True
+        )
+        top_row.add_widget(resolution_label)
+        
+        format_label = Label(
+            font_size='12sp',
+            halign='right',
+            color=(0.5, 0.5, 0.5, 1)
+        )
+        top_row.add_widget(format_label)
+        
+        # Middle row: Codec info
+        middle_row = BoxLayout(size_hint_y=0.3)
+        
+        codec_label = Label(font_size='11sp')
+        middle_row.add_widget(codec_label)
+        
+        # Bottom row: File size
+        bottom_row = BoxLayout(size_hint_y=0.3)
+        
+        size_label = Label(
+            font_size='11sp',
+            color=(0.4, 0.4, 0.4, 1)
+        )
+        bottom_row.add_widget(size_label)
+        
+        self.add_widget(top_row)
+        self.add_widget(middle_row)
+        self.add_widget(bottom_row)
+        
+        self.bind(
+            resolution=lambda instance, value: setattr(resolution_label, 'text', f"[b]{value}[/b]"),
+            format_note=format_label.setter('text'),
+            codec_text=codec_label.setter('text'),
+            codec_color=codec_label.setter('color'),
+            size_text=size_label.setter('text'),
+            selected=self.update_background
+        )
+    
+    def update_background(self, *args):
+        self.bg_rect.pos = self.pos
+        self.bg_rect.size = self.size
+        self.bg_color.rgba = (0.1, 0.5, 0.8, 0.3) if self.selected else (0.95, 0.95, 0.95, 1)
+    
+    def refresh_view_attrs(self, rv, index, data):
+        self.index = index
+        self.list_view = rv
+        return super().refresh_view_attrs(rv, index, data)
+    
+    def on_release(self):
+        if self.list_view and self.list_view.select_callback:
+            self.list_view.select_callback(self.list_view, self.index)
+
+class QualityListView(RecycleView):
+    """Recycled list of quality rows for one category tab"""
+    select_callback = ObjectProperty(None, allownone=True)
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        rows = RecycleBoxLayout(
+            orientation='vertical',
+            spacing=dp(5),
+            default_size=(None, dp(75)),
+            default_size_hint=(1, None),
+            size_hint_y=None
+        )
+        rows.bind(minimum_height=rows.setter('height'))
+        self.add_widget(rows)
+        # The viewclass lives on the layout manager, so it is set once one exists
+        self.viewclass = QualityRow
+
+class JobRow(RecycleDataViewBehavior, BoxLayout):
+    """Recycled download queue row; the buttons act on the job in the row data"""
+    job = ObjectProperty(None, allownone=True)
+    job_id = StringProperty('')
+    title = StringProperty('')
+    state_text = StringProperty('')
+    state_color = ListProperty([0.6, 0.6, 0.6, 1])
+    actionable = BooleanProperty(False)  # Still downloading or waiting
+    urgent = BooleanProperty(False)
+    paused = BooleanProperty(False)
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.spacing = dp(5)
+        self.list_view = None
+        
+        id_label = Label(size_hint_x=0.1, font_size='11sp')
+        self.add_widget(id_label)
+        
+        title_label = Label(
+            size_hint_x=0.42,
+            font_size='11sp',
+            halign='left',
+            shorten=True
+        )
+        title_label.bind(size=title_label.setter('text_size'))
+        self.add_widget(title_label)
+        
+        state_label = Label(size_hint_x=0.2, font_size='11sp')
+        self.add_widget(state_label)
+        
+        # Priority, pause/resume and cancel
+        self.actions = BoxLayout(size_hint_x=0.28, spacing=dp(3))
+        self.priority_btn = Button(text="⚡", font_size='12sp')
+        self.priority_btn.bind(on_press=lambda x: self.act('priority'))
+        self.actions.add_widget(self.priority_btn)
+        
+        self.pause_btn = Button(font_size='12sp')
+        self.pause_btn.bind(on_press=lambda x: self.act('pause'))
+        self.actions.add_widget(self.pause_btn)
+        
+        cancel_btn = Button(
+            text="✖",
+            font_size='12sp',
+            background_color=(0.8, 0.2, 0.2, 1)
+        )
+        cancel_btn.bind(on_press=lambda x: self.act('cancel'))
+        self.actions.add_widget(cancel_btn)
+        self.add_widget(self.actions)
+        
+        self.bind(
+            job_id=id_label.setter('text'),
+            title=title_label.setter('text'),
+            state_text=state_label.setter('text'),
+            state_color=state_label.setter('color'),
+            actionable=self.update_actions,
+            urgent=self.update_actions,
+            paused=self.update_actions
+        )
+        self.update_actions()
+    
+    def update_actions(self, *args):
+        self.actions.opacity = 1 if self.actionable else 0
+        self.actions.disabled = not self.actionable
+        self.priority_btn.background_color = (0.9, 0.6, 0.1, 1) if self.urgent else (0.4, 0.4, 0.4, 1)
+        self.pause_btn.text = "▶" if self.paused else "⏸"
+        self.pause_btn.background_color = (0.2, 0.6, 0.2, 1) if self.paused else (0.1, 0.5, 0.8, 1)
+    
+    def refresh_view_attrs(self, rv, index, data):
+        self.list_view = rv
+        return super().refresh_view_attrs(rv, index, data)
+    
+    def act(self, action):
+        if self.job is not None and self.list_view and self.list_view.action_callback:
+            self.list_view.action_callback(action, self.job)
+
+class JobListView(RecycleView):
+    """Recycled list of download queue rows"""
+    action_callback = ObjectProperty(None, allownone=True)
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        rows = RecycleBoxLayout(
+            orientation='vertical',
+            spacing=dp(4),
+            default_size=(None, dp(30)),
+            default_size_hint=(1, None),
+            size_hint_y=None
+        )
+        rows.bind(minimum_height=rows.setter('height'))
+        self.add_widget(rows)
+        # The viewclass lives on the layout manager, so it is set once one exists
+        self.viewclass = JobRow
+
 class EnhancedQualityPopup(Popup):
-    def __init__(self, qualities, callback, video_title="", **kwargs):
+    # (category, tab title, title color) in carousel order
+    TABS = (
+        ('4k', "4K/2K Ultra HD", (0.8, 0.2, 0.2, 1)),
+        ('1080p', "Full HD 1080p", (0.2, 0.6, 0.2, 1)),
+        ('720p', "HD 720p", (0.1, 0.5, 0.8, 1)),
+        ('sd', "Standard Quality", (0.6, 0.3, 0.8, 1)),
+        ('audio', "Audio Only", (0.9, 0.6, 0.1, 1)),
+    )
+    
+    def __init__(self, qualities, callback, video_title="", policy=None, **kwargs):
         super().__init__(**kwargs)
         self.title = f"Select Quality for: {video_title[:30]}..."
         self.size_hint = (0.95, 0.85)
@@ -56,7 +346,11 @@ class EnhancedQualityPopup(Popup):
         self.title_color = (0.1, 0.5, 0.8, 1)
         self.separator_color = (0.1, 0.5, 0.8, 1)
         self.callback = callback
+        self.qualities = qualities
+        self.format_index = FormatIndex(qualities)
+        self.policy = policy or FormatPolicy()
         self.selected_quality = None
+        self.selected_index = None
         
         layout = BoxLayout(orientation='vertical', padding=dp(10), spacing=dp(10))
         
@@ -76,41 +370,27 @@ class EnhancedQualityPopup(Popup):
         ))
         layout.add_widget(info_header)
         
-        # Quality Categories
-        categories = self.categorize_qualities(qualities)
+        # Quality Categories (indexes into qualities)
+        self.categories = self.format_index.categories()
         
-        # Create tabs using Carousel
+        # Create tabs using Carousel; each tab is filled in when first shown
         carousel = Carousel(direction='right', size_hint_y=0.65)
+        self.list_views = {}
         
-        # 4K/2K Tab
-        if categories.get('4k'):
-            tab1 = self.create_quality_tab(categories['4k'], "4K/2K Ultra HD", (0.8, 0.2, 0.2, 1))
-            carousel.add_widget(tab1)
-        
-        # 1080p Tab
-        if categories.get('1080p'):
-            tab2 = self.create_quality_tab(categories['1080p'], "Full HD 1080p", (0.2, 0.6, 0.2, 1))
-            carousel.add_widget(tab2)
-        
-        # 720p Tab
-        if categories.get('720p'):
-            tab3 = self.create_quality_tab(categories['720p'], "HD 720p", (0.1, 0.5, 0.8, 1))
-            carousel.add_widget(tab3)
-        
-        # SD Tab
-        if categories.get('sd'):
-            tab4 = self.create_quality_tab(categories['sd'], "Standard Quality", (0.6, 0.3, 0.8, 1))
-            carousel.add_widget(tab4)
-        
-        # Audio Only Tab
-        if categories.get('audio'):
-            tab5 = self.create_quality_tab(categories['audio'], "Audio Only", (0.9, 0.6, 0.1, 1))
-            carousel.add_widget(tab5)
+        for category, tab_title, title_color in self.TABS:
+            if self.categories.get(category):
+                tab = BoxLayout(orientation='vertical', spacing=dp(5))
+                tab.category = category
+                tab.tab_title = tab_title
+                tab.title_color = title_color
+                carousel.add_widget(tab)
         
+        carousel.bind(index=self.on_tab_shown)
         layout.add_widget(carousel)
         
         # Carousel indicators
         indicators = BoxLayout(size_hint_y=0.05, spacing=dp(5))
+        self.indicators = []
         for i in range(len(carousel.slides)):
             indicator = Label(
                 text="●",
@@ -118,8 +398,12 @@ class EnhancedQualityPopup(Popup):
                 color=(0.1, 0.5, 0.8, 1) if i == carousel.index else (0.8, 0.8, 0.8, 1)
             )
             indicators.add_widget(indicator)
+            self.indicators.append(indicator)
         layout.add_widget(indicators)
         
+        if carousel.slides:
+            self.on_tab_shown(carousel, carousel.index)
+        
         # Action Buttons
         action_layout = BoxLayout(size_hint_y=0.15, spacing=dp(10), padding=dp(5))
         
@@ -129,7 +413,7 @@ class EnhancedQualityPopup(Popup):
             color=(1, 1, 1, 1),
             markup=True
         )
-        auto_best_btn.bind(on_press=lambda x: self.auto_select_best(qualities))
+        auto_best_btn.bind(on_press=lambda x: self.auto_select_best())
         action_layout.add_widget(auto_best_btn)
         
         select_btn = Button(
@@ -156,132 +440,49 @@ class EnhancedQualityPopup(Popup):
         
         self.add_widget(layout)
     
-    def categorize_qualities(self, qualities):
-        """Categorize qualities by resolution"""
-        categories = {
-            '4k': [],    # 4K and 2K
-            '1080p': [], # 1080p
-            '720p': [],  # 720p
-            'sd': [],    # Below 720p
-            'audio': []  # Audio only
-        }
-        
-        for quality in qualities:
-            vcodec = quality.get('vcodec', 'none')
-            acodec = quality.get('acodec', 'none')
-            
-            if vcodec == 'none' and acodec != 'none':
-                categories['audio'].append(quality)
-                continue
-            
-            res = quality.get('resolution', '')
-            if '3840' in res or '2160' in res or '1440' in res or '2880' in res:
-                categories['4k'].append(quality)
-            elif '1080' in res:
-                categories['1080p'].append(quality)
-            elif '720' in res:
-                categories['720p'].append(quality)
-            else:
-                categories['sd'].append(quality)
-        
-        return categories
+    def on_tab_shown(self, carousel, index):
+        """Build a tab the first time it is shown and move the indicator"""
+        for i, indicator in enumerate(self.indicators):
+            indicator.color = (0.1, 0.5, 0.8, 1) if i == index else (0.8, 0.8, 0.8, 1)
+        
+        tab = carousel.slides[index]
+        if tab.category not in self.list_views:
+            self.create_quality_tab(tab)
     
-    def create_quality_tab(self, qualities, title, title_color):
-        """Create a tab for specific quality category"""
-        tab = BoxLayout(orientation='vertical', spacing=dp(5))
-        
+    def create_quality_tab(self, tab):
+        """Fill a tab with the recycled quality list for its category"""
         # Tab title
         title_label = Label(
-            text=f"[b]{title}[/b]",
+            text=f"[b]{tab.tab_title}[/b]",
             font_size='16sp',
             size_hint_y=0.1,
-            color=title_color,
+            color=tab.title_color,
             markup=True
         )
         tab.add_widget(title_label)
         
-        # Scrollable quality list
-        scroll = ScrollView()
-        quality_grid = GridLayout(cols=1, spacing=dp(5), size_hint_y=None)
-        quality_grid.bind(minimum_height=quality_grid.setter('height'))
-        
-        for quality in qualities:
-            quality_btn = self.create_quality_button(quality)
-            quality_grid.add_widget(quality_btn)
+        # Scrollable quality list; widgets exist only for visible rows
+        list_view = QualityListView(select_callback=self.on_row_selected)
+        list_view.data = [self.quality_row_data(i) for i in self.categories[tab.category]]
+        tab.add_widget(list_view)
         
-        quality_grid.height = len(qualities) * dp(80)
-        scroll.add_widget(quality_grid)
-        tab.add_widget(scroll)
-        
-        return tab
+        self.list_views[tab.category] = list_view
     
-    def create_quality_button(self, quality):
-        """Create a quality selection button"""
-        btn = Button(
-            size_hint_y=None,
-            height=dp(75),
-            background_color=(0.95, 0.95, 0.95, 1),
-            background_normal='',
-            background_down=''
-        )
-        
-        # Create custom layout inside button
-        with btn.canvas.before:
-            Color(0.9, 0.9, 0.9, 1)
-            Rectangle(pos=btn.pos, size=btn.size)
-        
-        # Main button layout
-        btn_layout = BoxLayout(orientation='vertical', padding=dp(5))
-        
-        # Top row: Resolution and Format
-        top_row = BoxLayout(size_hint_y=0.4)
-        
-        resolution = quality.get('resolution', 'Unknown')
-        format_note = quality.get('format_note', '')
-        
-        resolution_label = Label(
-            text=f"[b]{resolution}[/b]",
-            font_size='14sp',
-            halign='left',
-            markup=True
-        )
-        top_row.add_widget(resolution_label)
-        
-        format_label = Label(
-            text=f"{format_note}",
-            font_size='12sp',
-            halign='right',
-            color=(0.5, 0.5, 0.5, 1)
-        )
-        top_row.add_widget(format_label)
+    def quality_row_data(self, index):
+        """Build the display data for one quality row"""
+        record = self.qualities[index]
         
-        # Middle row: Codec info
-        middle_row = BoxLayout(size_hint_y=0.3)
-        
-        vcodec = quality.get('vcodec', 'none')
-        acodec = quality.get('acodec', 'none')
-        
-        if vcodec != 'none' and acodec != 'none':
+        if record.has_video and record.has_audio:
             codec_text = "🎥+🔊 Video+Audio"
             codec_color = (0.2, 0.6, 0.2, 1)
-        elif vcodec != 'none':
+        elif record.has_video:
             codec_text = "🎥 Video Only"
             codec_color = (0.8, 0.5, 0.2, 1)
         else:
             codec_text = "🔊 Audio Only"
             codec_color = (0.8, 0.2, 0.8, 1)
         
-        codec_label = Label(
-            text=codec_text,
-            font_size='11sp',
-            color=codec_color
-        )
-        middle_row.add_widget(codec_label)
-        
-        # Bottom row: File size
-        bottom_row = BoxLayout(size_hint_y=0.3)
-        
-        filesize = quality.get('filesize', 0)
+        filesize = record.filesize
         if filesize:
             if filesize > 1024*1024*1024:  # GB
                 size_text = f"📦 {filesize/(1024*1024*1024):.1f} GB"
@@ -294,76 +495,57 @@ class EnhancedQualityPopup(Popup):
         else:
             size_text = "📦 Size: Unknown"
         
-        size_label = Label(
-            text=size_text,
-            font_size='11sp',
-            color=(0.4, 0.4, 0.4, 1)
-        )
-        bottom_row.add_widget(size_label)
-        
-        # Add all rows to button layout
-        btn_layout.add_widget(top_row)
-        btn_layout.add_widget(middle_row)
-        btn_layout.add_widget(bottom_row)
-        
-        btn.add_widget(btn_layout)
-        
-        # Bind click event
-        btn.bind(on_press=lambda instance, q=quality: self.on_quality_click(instance, q))
-        
-        return btn
+        return {
+            'quality_index': index,
+            'resolution': record.resolution,
+            'format_note': record.format_note,
+            'codec_text': codec_text,
+            'codec_color': codec_color,
+            'size_text': size_text,
+            'selected': index == self.selected_index
+        }
+    
+    def on_row_selected(self, list_view, row):
+        """Handle a tap on a quality row"""
+        self.on_quality_click(list_view.data[row]['quality_index'])
     
-    def on_quality_click(self, instance, quality):
-        """Handle quality button click"""
-        # Reset all buttons
-        for tab in self.children[0].children:
-            if hasattr(tab, 'children'):
-                for child in tab.children:
-                    if isinstance(child, ScrollView):
-                        for btn in child.children[0].children:
-                            btn.background_color = (0.95, 0.95, 0.95, 1)
+    def on_quality_click(self, index):
+        """Select the quality at index and move the highlight to its row"""
+        previous, self.selected_index = self.selected_index, index
         
-        # Highlight selected button
-        instance.background_color = (0.1, 0.5, 0.8, 0.3)
+        # Only the previously and newly selected rows change
+        for list_view in self.list_views.values():
+            for row, data in enumerate(list_view.data):
+                if data['quality_index'] in (previous, index):
+                    list_view.data[row] = dict(data, selected=data['quality_index'] == index)
         
         # Store selected quality
-        self.selected_quality = quality
+        record = self.qualities[index]
+        self.selected_quality = record.quality()
         
         # Enable select button
         self.select_btn.disabled = False
         
         # Update select button text with quality info
-        resolution = quality.get('resolution', 'Unknown')
-        filesize = quality.get('filesize', 0)
+        resolution = record.resolution
+        filesize = record.filesize
         if filesize > 1024*1024:
             size_mb = filesize/(1024*1024)
             self.select_btn.text = f"[b]Select ({resolution}, {size_mb:.1f}MB)[/b]"
         else:
             self.select_btn.text = f"[b]Select ({resolution})[/b]"
     
-    def auto_select_best(self, qualities):
-        """Automatically select the best quality"""
-        # Prefer formats with both video and audio
-        complete_formats = [q for q in qualities 
-                          if q.get('vcodec') != 'none' and q.get('acodec') != 'none']
-        
-        if complete_formats:
-            # Sort by resolution (descending)
-            complete_formats.sort(
-                key=lambda x: (
-                    int(x['resolution'].split('x')[1]) if 'x' in x['resolution'] 
-                    and x['resolution'].split('x')[1].isdigit() else 0
-                ), 
-                reverse=True
-            )
-            best = complete_formats[0]
-        elif qualities:
-            best = qualities[0]
-        else:
+    def auto_select_best(self):
+        """Select the formats the quality policy scores best"""
+        video, audio = self.policy.select(self.format_index)
+        best = video or audio
+        if best is None:
             return
         
-        # Find and click the corresponding button
-        self.on_quality_click(None, best)
+        self.on_quality_click(best.index)
+        if video and audio:
+            # Merge the best audio stream into the video-only format
+            self.selected_quality = video.quality(f"{video.format_id}+{audio.format_id}")
     
     def confirm_selection(self, instance):
         """Confirm quality selection"""
@@ -427,7 +609,7 @@ class SettingsPopup(Popup):
     def __init__(self, current_settings, callback, **kwargs):
         super().__init__(**kwargs)
         self.title = "Download Settings"
-        self.size_hint = (0.9, 0.7)
+        self.size_hint = (0.9, 0.95)
         self.callback = callback
         
         layout = BoxLayout(orientation='vertical', padding=dp(20), spacing=dp(15))
@@ -443,8 +625,9 @@ class SettingsPopup(Popup):
         path_layout.add_widget(self.path_input)
         layout.add_widget(path_layout)
         
-        # Concurrent Downloads
-        concurrent_layout = BoxLayout(orientation='vertical', size_hint_y=0.2, spacing=dp(5))
+        # Concurrent Downloads and FFmpeg Jobs
+        workers_layout = BoxLayout(size_hint_y=0.2, spacing=dp(10))
+        concurrent_layout = BoxLayout(orientation='vertical', spacing=dp(5))
         concurrent_layout.add_widget(Label(text="Concurrent Downloads:", font_size='14sp'))
         self.concurrent_spinner = Spinner(
             text=str(current_settings.get('concurrent', '1')),
@@ -452,7 +635,18 @@ class SettingsPopup(Popup):
             font_size='14sp'
         )
         concurrent_layout.add_widget(self.concurrent_spinner)
-        layout.add_widget(concurrent_layout)
+        workers_layout.add_widget(concurrent_layout)
+        
+        processors_layout = BoxLayout(orientation='vertical', spacing=dp(5))
+        processors_layout.add_widget(Label(text="Processing Jobs (FFmpeg):", font_size='14sp'))
+        self.processors_spinner = Spinner(
+            text=str(current_settings.get('processors', DEFAULT_PROCESSORS)),
+            values=('1', '2', '3', '4'),
+            font_size='14sp'
+        )
+        processors_layout.add_widget(self.processors_spinner)
+        workers_layout.add_widget(processors_layout)
+        layout.add_widget(workers_layout)
         
         # Retry Attempts
         retry_layout = BoxLayout(orientation='vertical', size_hint_y=0.2, spacing=dp(5))
@@ -465,6 +659,62 @@ class SettingsPopup(Popup):
         retry_layout.add_widget(self.retry_spinner)
         layout.add_widget(retry_layout)
         
+        # Parallel Fragments
+        fragments_layout = BoxLayout(orientation='vertical', size_hint_y=0.2, spacing=dp(5))
+        fragments_layout.add_widget(Label(text="Parallel Fragments (DASH/HLS):", font_size='14sp'))
+        self.fragments_spinner = Spinner(
+            text=str(current_settings.get('fragments', DEFAULT_FRAGMENTS)),
+            values=('1', '2', '4', '8', '16'),
+            font_size='14sp'
+        )
+        fragments_layout.add_widget(self.fragments_spinner)
+        layout.add_widget(fragments_layout)
+        
+        # HTTP Chunk Size
+        chunk_layout = BoxLayout(orientation='vertical', size_hint_y=0.2, spacing=dp(5))
+        chunk_layout.add_widget(Label(text="HTTP Chunk Size (MB, 0 = auto):", font_size='14sp'))
+        self.chunk_spinner = Spinner(
+            text=str(current_settings.get('chunk_size', '0')),
+            values=('0', '1', '5', '10', '20'),
+            font_size='14sp'
+        )
+        chunk_layout.add_widget(self.chunk_spinner)
+        layout.add_widget(chunk_layout)
+        
+        # Bandwidth Limit
+        bandwidth_layout = BoxLayout(orientation='vertical', size_hint_y=0.2, spacing=dp(5))
+        bandwidth_layout.add_widget(Label(text="Bandwidth Limit (KB/s, 0 = unlimited):", font_size='14sp'))
+        self.bandwidth_spinner = Spinner(
+            text=str(current_settings.get('bandwidth_limit', '0')),
+            values=('0', '256', '512', '1024', '2048', '5120', '10240'),
+            font_size='14sp'
+        )
+        bandwidth_layout.add_widget(self.bandwidth_spinner)
+        layout.add_widget(bandwidth_layout)
+        
+        # Quality Policy (Auto Select Best and playlists)
+        policy_layout = BoxLayout(size_hint_y=0.2, spacing=dp(10))
+        codec_layout = BoxLayout(orientation='vertical', spacing=dp(5))
+        codec_layout.add_widget(Label(text="Preferred Codec:", font_size='14sp'))
+        self.codec_spinner = Spinner(
+            text=str(current_settings.get('preferred_codec', 'any')),
+            values=('any', 'av01', 'vp9', 'avc1'),
+            font_size='14sp'
+        )
+        codec_layout.add_widget(self.codec_spinner)
+        policy_layout.add_widget(codec_layout)
+        
+        max_size_layout = BoxLayout(orientation='vertical', spacing=dp(5))
+        max_size_layout.add_widget(Label(text="Max Size (MB, 0 = any):", font_size='14sp'))
+        self.max_size_spinner = Spinner(
+            text=str(current_settings.get('max_size_mb', '0')),
+            values=('0', '50', '100', '250', '500', '1000', '2000'),
+            font_size='14sp'
+        )
+        max_size_layout.add_widget(self.max_size_spinner)
+        policy_layout.add_widget(max_size_layout)
+        layout.add_widget(policy_layout)
+        
         # Action Buttons
         btn_layout = BoxLayout(size_hint_y=0.2, spacing=dp(10))
         
@@ -494,32 +744,333 @@ class SettingsPopup(Popup):
         settings = {
             'path': self.path_input.text,
             'concurrent': self.concurrent_spinner.text,
-            'retry': self.retry_spinner.text
+            'processors': self.processors_spinner.text,
+            'retry': self.retry_spinner.text,
+            'fragments': self.fragments_spinner.text,
+            'chunk_size': self.chunk_spinner.text,
+            'bandwidth_limit': self.bandwidth_spinner.text,
+            'preferred_codec': self.codec_spinner.text,
+            'max_size_mb': self.max_size_spinner.text
         }
         if self.callback:
             self.callback(settings)
         self.dismiss()
 
+class QueuePopup(Popup):
+    def __init__(self, download_queue, **kwargs):
+        super().__init__(**kwargs)
+        self.title = "Download Queue"
+        self.size_hint = (0.95, 0.8)
+        self.download_queue = download_queue
+        
+        layout = BoxLayout(orientation='vertical', padding=dp(10), spacing=dp(10))
+        
+        self.summary_label = Label(
+            text="",
+            font_size='12sp',
+            size_hint_y=0.08,
+            color=(0.9, 0.9, 0.9, 1)
+        )
+        layout.add_widget(self.summary_label)
+        
+        # Job list; only rows on screen get widgets
+        self.jobs_view = JobListView(action_callback=self.job_action)
+        layout.add_widget(self.jobs_view)
+        
+        # Action Buttons
+        btn_layout = BoxLayout(size_hint_y=0.12, spacing=dp(10))
+        
+        clear_btn = Button(
+            text="[b]Clear Finished[/b]",
+            background_color=(0.1, 0.5, 0.8, 1),
+            color=(1, 1, 1, 1),
+            markup=True
+        )
+        clear_btn.bind(on_press=self.clear_finished)
+        btn_layout.add_widget(clear_btn)
+        
+        close_btn = Button(
+            text="[b]Close[/b]",
+            background_color=(0.8, 0.2, 0.2, 1),
+            color=(1, 1, 1, 1),
+            markup=True
+        )
+        close_btn.bind(on_press=self.dismiss)
+        btn_layout.add_widget(close_btn)
+        
+        layout.add_widget(btn_layout)
+        
+        self.add_widget(layout)
+        
+        self.refresh()
+        self._refresh_event = Clock.schedule_interval(lambda dt: self.refresh(), 0.5)
+    
+    def refresh(self):
+        """Update the job list from the queue state, changing only the rows that changed"""
+        rows = [self.job_row(job) for job in self.download_queue.snapshot()]
+        data = self.jobs_view.data
+        for index, row in enumerate(rows[:len(data)]):
+            if data[index] != row:
+                data[index] = row
+        if len(rows) < len(data):
+            del data[len(rows):]
+        elif len(rows) > len(data):
+            data.extend(rows[len(data):])
+        
+        self.summary_label.text = self.download_queue.summary()
+    
+    def job_row(self, job):
+        """The row data for one job"""
+        if job.state == DownloadJob.RUNNING:
+            state_text = f"{job.state} {job.progress:.0f}%"
+        elif job.state in (DownloadJob.PROCESSING, DownloadJob.PAUSED):
+            progress = job.processing_progress if job.state == DownloadJob.PROCESSING else job.progress
+            state_text = f"{job.state} {progress:.0f}%"
+        else:
+            state_text = job.state
+        
+        return {
+            'job': job,
+            'job_id': f"#{job.id}",
+            'title': job.title,
+            'state_text': state_text,
+            'state_color': JOB_STATE_COLORS.get(job.state, (0.6, 0.6, 0.6, 1)),
+            'actionable': not job.finished and job.state != DownloadJob.PROCESSING,
+            'urgent': job.priority >= DownloadJob.URGENT,
+            'paused': job.state == DownloadJob.PAUSED
+        }
+    
+    def job_action(self, action, job):
+        """Apply a row button's action to its job"""
+        if action == 'priority':
+            self.download_queue.set_priority(
+                job, DownloadJob.NORMAL if job.priority >= DownloadJob.URGENT else DownloadJob.URGENT)
+        elif action == 'pause':
+            if job.state == DownloadJob.PAUSED:
+                self.download_queue.resume(job)
+            else:
+                self.download_queue.pause(job)
+        elif action == 'cancel':
+            self.download_queue.cancel(job)
+        self.refresh()
+    
+    def clear_finished(self, instance):
+        self.download_queue.clear_finished()
+        self.refresh()
+    
+    def on_dismiss(self):
+        self._refresh_event.cancel()
+
+class BatchPopup(Popup):
+    """Streams the metadata of a batch of URLs into a list as it arrives"""
+    def __init__(self, batch, policy, on_download, **kwargs):
+        super().__init__(**kwargs)
+        self.title = f"Batch: {len(batch.items)} URLs"
+        self.size_hint = (0.95, 0.8)
+        self.batch = batch
+        self.policy = policy
+        self.on_download = on_download
+        
+        layout = BoxLayout(orientation='vertical', padding=dp(10), spacing=dp(10))
+        
+        self.summary_label = Label(
+            text="",
+            font_size='12sp',
+            size_hint_y=0.08,
+            color=(0.9, 0.9, 0.9, 1)
+        )
+        layout.add_widget(self.summary_label)
+        
+        # Scrollable result list
+        scroll = ScrollView()
+        self.items_grid = GridLayout(cols=1, spacing=dp(4), size_hint_y=None)
+        self.items_grid.bind(minimum_height=self.items_grid.setter('height'))
+        scroll.add_widget(self.items_grid)
+        layout.add_widget(scroll)
+        
+        # Action Buttons
+        btn_layout = BoxLayout(size_hint_y=0.12, spacing=dp(10))
+        
+        self.download_btn = Button(
+            text=f"[b]Download All ({policy.label})[/b]",
+            background_color=(0.1, 0.6, 0.3, 1),
+            color=(1, 1, 1, 1),
+            markup=True
+        )
+        self.download_btn.bind(on_press=self.download_all)
+        btn_layout.add_widget(self.download_btn)
+        
+        close_btn = Button(
+            text="[b]Close[/b]",
+            background_color=(0.8, 0.2, 0.2, 1),
+            color=(1, 1, 1, 1),
+            markup=True
+        )
+        close_btn.bind(on_press=self.dismiss)
+        btn_layout.add_widget(close_btn)
+        
+        layout.add_widget(btn_layout)
+        
+        self.add_widget(layout)
+        
+        self.refresh()
+        self._refresh_event = Clock.schedule_interval(lambda dt: self.refresh(), 0.5)
+    
+    def refresh(self):
+        """Rebuild the result list from the batch state"""
+        state_colors = {
+            BatchItem.FETCHING: (0.6, 0.6, 0.6, 1),
+            BatchItem.READY: (0.1, 0.5, 0.8, 1),
+            BatchItem.QUEUED: (0.2, 0.6, 0.2, 1),
+            BatchItem.SKIPPED: (0.6, 0.6, 0.6, 1),
+            BatchItem.FAILED: (0.8, 0.2, 0.2, 1)
+        }
+        
+        self.items_grid.clear_widgets()
+        for item in self.batch.items:
+            if item.state == BatchItem.READY and not item.playlist:
+                # The quality the default policy will pick for this video
+                state_text = self.policy.resolve(FormatIndex(item.summary.formats))[1]
+            elif item.playlist and item.state == BatchItem.READY:
+                state_text = "playlist"
+            else:
+                state_text = item.state
+            
+            row = BoxLayout(size_hint_y=None, height=dp(30), spacing=dp(5))
+            title_label = Label(
+                text=item.error if item.state == BatchItem.FAILED else item.title,
+                size_hint_x=0.7,
+                font_size='11sp',
+                halign='left',
+                shorten=True
+            )
+            title_label.bind(size=title_label.setter('text_size'))
+            row.add_widget(title_label)
+            row.add_widget(Label(
+                text=state_text,
+                size_hint_x=0.3,
+                font_size='11sp',
+                color=state_colors.get(item.state, (0.6, 0.6, 0.6, 1))
+            ))
+            self.items_grid.add_widget(row)
+        
+        self.summary_label.text = self.batch.summary()
+    
+    def download_all(self, instance):
+        self.download_btn.disabled = True
+        self.on_download(self.batch)
+    
+    def on_dismiss(self):
+        self._refresh_event.cancel()
+
+class ImportPopup(Popup):
+    """Pick a text file of URLs to import"""
+    def __init__(self, callback, **kwargs):
+        super().__init__(**kwargs)
+        self.title = "Import URLs from a Text File"
+        self.size_hint = (0.95, 0.85)
+        self.callback = callback
+        
+        layout = BoxLayout(orientation='vertical', padding=dp(10), spacing=dp(10))
+        
+        self.chooser = FileChooserListView(
+            path=str(Path.home()),
+            filters=['*.txt', '*.csv', '*.list']
+        )
+        layout.add_widget(self.chooser)
+        
+        btn_layout = BoxLayout(size_hint_y=0.12, spacing=dp(10))
+        
+        import_btn = Button(
+            text="[b]Import[/b]",
+            background_color=(0.1, 0.5, 0.8, 1),
+            color=(1, 1, 1, 1),
+            markup=True
+        )
+        import_btn.bind(on_press=self.import_file)
+        btn_layout.add_widget(import_btn)
+        
+        cancel_btn = Button(
+            text="[b]Cancel[/b]",
+            background_color=(0.8, 0.2, 0.2, 1),
+            color=(1, 1, 1, 1),
+            markup=True
+        )
+        cancel_btn.bind(on_press=self.dismiss)
+        btn_layout.add_widget(cancel_btn)
+        
+        layout.add_widget(btn_layout)
+        
+        self.add_widget(layout)
+    
+    def import_file(self, instance):
+        if not self.chooser.selection:
+            return
+        self.callback(self.chooser.selection[0])
+        self.dismiss()
+
+class LogBuffer:
+    """Fixed-capacity ring buffer of (timestamp, type, message) log records"""
+    def __init__(self, capacity=LOG_CAPACITY):
+        self.capacity = capacity
+        self._records = deque(maxlen=capacity)
+        self._appended = 0
+        self._lock = threading.Lock()
+    
+    def append(self, timestamp, message_type, message):
+        with self._lock:
+            self._records.append((timestamp, message_type, message))
+            self._appended += 1
+    
+    def since(self, seq):
+        """Return the records appended after seq that are still buffered, and the new seq"""
+        with self._lock:
+            count = min(self._appended - seq, len(self._records))
+            start = len(self._records) - count
+            return list(itertools.islice(self._records, start, None)), self._appended
+    
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
 class VideMonApp(App):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.available_qualities = []
+        self.available_qualities = []  # FormatRecords of video_summary, best first
         self.selected_quality = None
         self.selected_format = "mp4"
-        self.video_info = {}
-        self.download_history = []
-        self.settings = {
-            'path': 'VideMon_Downloads',
-            'concurrent': '1',
-            'retry': '3'
-        }
+        self.video_summary = None
+        self.engine = None
+        self.batch = None  # Last batch of URLs whose info was fetched
+        self.info_url = None  # URL that video_summary and available_qualities belong to
+        self.prefetch_url = None  # URL being (or already) fetched in the background
+        self.active_progress = {}
+        self.active_processing = {}
+        self.log_buffer = LogBuffer()
+        self.log_seq = 0
+        self.log_view = None
+        self.flush_log_trigger = Clock.create_trigger(self.flush_log)
+    
+    @property
+    def settings(self):
+        return self.engine.settings
+    
+    @property
+    def download_queue(self):
+        return self.engine.download_queue
     
     def build(self):
         self.title = "VideMon - YouTube Downloader Pro"
         self.icon = "icon.png"
         
-        # Load settings if exists
-        self.load_settings()
+        # Headless engine: settings, queue, history and caches
+        self.engine = DownloadEngine(on_log=self.add_log)
+        # Job updates and fetched info reach the app on this event loop, never on worker threads
+        self.orchestrator = Orchestrator(self.engine, asyncio.get_running_loop(), on_job_update=self.on_job_update)
+        
+        # Publish merged download progress at a fixed rate
+        progress_rate = float(self.settings.get('progress_rate', PROGRESS_RATE))
+        Clock.schedule_interval(self.publish_progress, 1 / progress_rate)
         
         # Main layout
         main_layout = BoxLayout(orientation='vertical', padding=dp(10), spacing=dp(10))
@@ -569,7 +1120,7 @@ class VideMonApp(App):
         
         url_input_layout = BoxLayout(spacing=dp(5))
         self.url_input = TextInput(
-            hint_text="Paste YouTube video or playlist URL here...",
+            hint_text="Paste YouTube video or playlist URLs here...",
             multiline=False,
             font_size='14sp',
             background_color=(0.98, 0.98, 0.98, 1),
@@ -578,6 +1129,10 @@ class VideMonApp(App):
         )
         url_input_layout.add_widget(self.url_input)
         
+        # Fetch info in the background once typing pauses on a single video URL
+        self._prefetch_trigger = Clock.create_trigger(self.start_prefetch, PREFETCH_DELAY)
+        self.url_input.bind(text=self.on_url_changed)
+        
         # Paste button
         paste_btn = Button(
             text="📋",
@@ -588,6 +1143,16 @@ class VideMonApp(App):
         paste_btn.bind(on_press=self.paste_from_clipboard)
         url_input_layout.add_widget(paste_btn)
         
+        # Import button
+        import_btn = Button(
+            text="📂",
+            size_hint_x=0.15,
+            font_size='18sp',
+            background_color=(0.9, 0.9, 0.9, 1)
+        )
+        import_btn.bind(on_press=self.show_import_popup)
+        url_input_layout.add_widget(import_btn)
+        
         url_section.add_widget(url_input_layout)
         content_card.add_widget(url_section)
         
@@ -679,13 +1244,23 @@ class VideMonApp(App):
         content_card.add_widget(progress_section)
         
         # Stats Row
-        stats_row = BoxLayout(size_hint_y=0.1)
+        stats_row = BoxLayout(size_hint_y=0.1, spacing=dp(5))
         self.stats_label = Label(
             text="Downloads: 0 | Storage: 0 MB",
             font_size='11sp',
             color=(0.6, 0.6, 0.6, 1)
         )
         stats_row.add_widget(self.stats_label)
+        
+        self.queue_btn = Button(
+            text="📋 Queue: 0",
+            size_hint_x=0.35,
+            font_size='11sp',
+            background_color=(0.95, 0.95, 0.95, 1),
+            color=(0.3, 0.3, 0.3, 1)
+        )
+        self.queue_btn.bind(on_press=self.show_queue_popup)
+        stats_row.add_widget(self.queue_btn)
         content_card.add_widget(stats_row)
         
         main_layout.add_widget(content_card)
@@ -714,12 +1289,18 @@ class VideMonApp(App):
         log_header.add_widget(clear_log_btn)
         log_card.add_widget(log_header)
         
-        # Log scroll view
-        scroll = ScrollView()
-        self.log_layout = GridLayout(cols=1, spacing=dp(2), size_hint_y=None)
-        self.log_layout.bind(minimum_height=self.log_layout.setter('height'))
-        scroll.add_widget(self.log_layout)
-        log_card.add_widget(scroll)
+        # Log view; only rows on screen get widgets
+        self.log_view = RecycleView(viewclass=LogRow)
+        log_rows = RecycleBoxLayout(
+            orientation='vertical',
+            spacing=dp(2),
+            default_size=(None, dp(25)),
+            default_size_hint=(1, None),
+            size_hint_y=None
+        )
+        log_rows.bind(minimum_height=log_rows.setter('height'))
+        self.log_view.add_widget(log_rows)
+        log_card.add_widget(self.log_view)
         
         main_layout.add_widget(log_card)
         
@@ -741,33 +1322,112 @@ class VideMonApp(App):
         
         main_layout.add_widget(footer)
         
-        # Update stats
+        # Update stats; storage is exact once the folder index has caught up
         self.update_stats()
+        self.refresh_storage()
+        
+        # Pick up downloads interrupted when the app was last killed
+        self.engine.resume_journaled_jobs()
         
         return main_layout
     
+    def on_stop(self):
+        """Stop the info executor; unfinished downloads stay in the journal"""
+        self.orchestrator.shutdown()
+    
     def paste_from_clipboard(self, instance):
         """Paste from clipboard to URL input"""
         try:
             import pyperclip
             clipboard_text = pyperclip.paste()
             if clipboard_text and ('youtube.com' in clipboard_text or 'youtu.be' in clipboard_text):
-                self.url_input.text = clipboard_text
-                self.add_log("URL pasted from clipboard", "success")
+                urls = split_urls(clipboard_text)
+                self.url_input.text = ' '.join(urls)
+                self.add_log(f"{len(urls)} URL(s) pasted from clipboard", "success")
+                # A pasted URL is complete; don't wait for the typing delay
+                self.start_prefetch()
         except:
             self.add_log("Clipboard not available", "warning")
     
+    def on_url_changed(self, instance, text):
+        """Restart the prefetch delay on every edit of the URL"""
+        self._prefetch_trigger.cancel()
+        self._prefetch_trigger()
+    
+    def start_prefetch(self, dt=None):
+        """Fetch the info of a single video URL in the background, superseding any earlier prefetch"""
+        self._prefetch_trigger.cancel()
+        urls = split_urls(self.url_input.text)
+        url = urls[0] if len(urls) == 1 else None
+        # Only complete video URLs; a half-typed ID has fewer than 11 characters
+        if url and (is_playlist_url(url) or canonical_video_id(url) is None):
+            url = None
+        
+        if url is None:
+            self.orchestrator.cancel_prefetch()
+            self.prefetch_url = None
+            return
+        if url in (self.prefetch_url, self.info_url):
+            return
+        
+        self.prefetch_url = url
+        self.orchestrator.prefetch(url, self.on_prefetched)
+    
+    def on_prefetched(self, url, summary, error):
+        """Take a background fetch's result unless the URL has changed since"""
+        if url != self.prefetch_url:
+            return
+        
+        if error:
+            # Let GET VIDEO INFO try again and report the error
+            self.prefetch_url = None
+            self.add_log(f"Background info fetch failed: {error[:60]}", "warning")
+            return
+        
+        self.video_summary = summary
+        self.available_qualities = summary.formats
+        self.info_url = url
+        
+        title = self.video_summary.title
+        self.update_status(f"✅ Ready: {title[:40]}...", (0.2, 0.6, 0.2, 1))
+        self.add_log(f"Video info ready: {len(self.available_qualities)} qualities available", "success")
+        self.quality_btn.background_color = (0.1, 0.5, 0.8, 1)
+        self.quality_btn.color = (1, 1, 1, 1)
+    
+    def show_import_popup(self, instance):
+        """Show the file picker for importing URLs"""
+        popup = ImportPopup(self.import_urls)
+        popup.open()
+    
+    def import_urls(self, path):
+        """Load the URLs in a text file and start fetching their info"""
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                urls = split_urls(f.read())
+        except OSError as e:
+            self.show_popup("Error", f"Cannot read file:\n{str(e)}")
+            return
+        
+        if not urls:
+            self.show_popup("Information", "No URLs found in the file.")
+            return
+        
+        self.url_input.text = ' '.join(urls)
+        self.add_log(f"Imported {len(urls)} URL(s) from {os.path.basename(path)}", "success")
+        self.get_video_info_and_qualities(None)
+    
     def show_quality_popup(self, instance):
         """Show enhanced quality selection popup"""
         if not self.available_qualities:
             self.show_popup("Information", "Please fetch video information first by clicking 'GET VIDEO INFO' button.")
             return
         
-        video_title = self.video_info.get('title', 'Video')
+        video_title = self.video_summary.title if self.video_summary else 'Video'
         popup = EnhancedQualityPopup(
             self.available_qualities, 
             self.on_quality_selected,
-            video_title
+            video_title,
+            policy=FormatPolicy.from_settings(self.settings, output_format=self.selected_format)
         )
         popup.open()
     
@@ -810,22 +1470,26 @@ class VideMonApp(App):
         popup = SettingsPopup(self.settings, self.on_settings_saved)
         popup.open()
     
+    def show_queue_popup(self, instance):
+        """Show download queue popup"""
+        popup = QueuePopup(self.download_queue)
+        popup.open()
+    
     def on_settings_saved(self, settings):
         """Handle settings save"""
-        self.settings = settings
-        self.save_settings()
+        self.engine.apply_settings(settings)
         self.add_log("Settings saved successfully", "success")
+        self.refresh_storage()
     
     def get_video_info_and_qualities(self, instance):
         """Fetch video information and available qualities"""
-        url = self.url_input.text.strip()
-        if not url:
-            self.show_popup("Error", "Please enter a YouTube URL first.")
+        urls = self.input_urls()
+        if urls is None:
             return
-        
-        if not ('youtube.com' in url or 'youtu.be' in url):
-            self.show_popup("Error", "Please enter a valid YouTube URL.")
+        if len(urls) > 1:
+            self.start_batch(urls)
             return
+        url = urls[0]
         
         self.update_status("🔍 Fetching video information...", (0.1, 0.5, 0.8, 1))
         self.add_log(f"Fetching info for: {url[:60]}...", "info")
@@ -834,87 +1498,33 @@ class VideMonApp(App):
         self.info_btn.disabled = True
         self.download_btn.disabled = True
         
-        def fetch_info():
-            try:
-                ydl_opts = {
-                    'quiet': True,
-                    'no_warnings': True,
-                    'extract_flat': False,
-                    'listformats': True,
-                }
-                
-                with youtube_dl.YoutubeDL(ydl_opts) as ydl:
-                    info = ydl.extract_info(url, download=False)
-                    
-                    # Store video info
-                    self.video_info = {
-                        'title': info.get('title', 'Unknown Video'),
-                        'duration': info.get('duration', 0),
-                        'uploader': info.get('uploader', 'Unknown'),
-                        'views': info.get('view_count', 0),
-                        'thumbnail': info.get('thumbnail', ''),
-                        'description': info.get('description', '')[:200] + '...',
-                        'url': info.get('webpage_url', url)
-                    }
-                    
-                    # Extract and format qualities
-                    self.available_qualities = []
-                    formats = info.get('formats', [])
-                    
-                    for fmt in formats:
-                        quality_info = {
-                            'format_id': fmt.get('format_id', ''),
-                            'resolution': fmt.get('resolution', 'Unknown'),
-                            'format_note': fmt.get('format_note', ''),
-                            'ext': fmt.get('ext', ''),
-                            'filesize': fmt.get('filesize', 0),
-                            'vcodec': fmt.get('vcodec', 'none'),
-                            'acodec': fmt.get('acodec', 'none'),
-                            'fps': fmt.get('fps', 0),
-                            'tbr': fmt.get('tbr', 0)  # Average bitrate
-                        }
-                        self.available_qualities.append(quality_info)
-                    
-                    # Sort by quality (resolution)
-                    self.available_qualities.sort(
-                        key=lambda x: self.get_resolution_value(x['resolution']),
-                        reverse=True
-                    )
-                    
-                    # Update UI on main thread
-                    Clock.schedule_once(lambda dt: self.on_info_fetched(info))
-                    
-            except Exception as e:
-                error_msg = str(e)
-                Clock.schedule_once(lambda dt: self.on_info_error(error_msg))
-        
-        threading.Thread(target=fetch_info, daemon=True).start()
-    
-    def get_resolution_value(self, resolution):
-        """Convert resolution string to numeric value for sorting"""
-        if 'x' in resolution:
-            try:
-                return int(resolution.split('x')[1])
-            except:
-                return 0
-        elif 'p' in resolution:
-            try:
-                return int(resolution.replace('p', ''))
-            except:
-                return 0
-        return 0
-    
-    def on_info_fetched(self, info):
+        self.orchestrator.start(self.fetch_video_info(url))
+    
+    async def fetch_video_info(self, url):
+        """Fetch on the info executor; the results are stored here, on the UI thread"""
+        try:
+            summary, cached = await self.orchestrator.fetch_info(url)
+        except Exception as e:
+            self.on_info_error(str(e))
+            return
+        
+        # Store video info
+        self.video_summary = summary
+        self.available_qualities = summary.formats
+        self.info_url = url
+        self.on_info_fetched(cached)
+    
+    def on_info_fetched(self, cached=False):
         """Handle successful info fetch"""
         # Enable buttons
         self.info_btn.disabled = False
         self.download_btn.disabled = False
         
         # Show video info
-        title = self.video_info['title']
-        duration = self.video_info['duration']
-        uploader = self.video_info['uploader']
-        views = self.video_info['views']
+        title = self.video_summary.title
+        duration = self.video_summary.duration
+        uploader = self.video_summary.uploader
+        views = self.video_summary.views
         
         # Format duration
         hours = duration // 3600
@@ -937,7 +1547,8 @@ class VideMonApp(App):
         
         # Update status
         self.update_status(f"✅ Found: {title[:40]}...", (0.2, 0.6, 0.2, 1))
-        self.add_log(f"Video info fetched: {len(self.available_qualities)} qualities available", "success")
+        source = " (cached)" if cached else ""
+        self.add_log(f"Video info fetched{source}: {len(self.available_qualities)} qualities available", "success")
         
         # Enable quality button
         self.quality_btn.background_color = (0.1, 0.5, 0.8, 1)
@@ -952,158 +1563,232 @@ class VideMonApp(App):
         self.update_status("❌ Failed to fetch info", (0.8, 0.2, 0.2, 1))
         self.add_log(f"Error: {error_msg}", "error")
     
+    def input_urls(self):
+        """Return the YouTube URLs in the input, or None after telling the user what's wrong"""
+        urls = split_urls(self.url_input.text)
+        if not urls:
+            self.show_popup("Error", "Please enter a YouTube URL first.")
+            return None
+        
+        valid = [url for url in urls if 'youtube.com' in url or 'youtu.be' in url]
+        if not valid:
+            self.show_popup("Error", "Please enter a valid YouTube URL.")
+            return None
+        if len(valid) < len(urls):
+            self.add_log(f"Ignored {len(urls) - len(valid)} non-YouTube entries", "warning")
+        return valid
+    
+    def default_policy(self):
+        """Quality policy for playlists and batches: the selected quality as a ceiling, plus the settings"""
+        max_height = None
+        if self.selected_quality:
+            max_height = FormatRecord(self.selected_quality).short_side or None
+        return FormatPolicy.from_settings(self.settings, max_height, self.selected_format)
+    
+    def start_batch(self, urls):
+        """Fetch info for many URLs concurrently and list the results as they arrive"""
+        self.batch = self.engine.prefetch_batch(urls, on_result=self.orchestrator.threadsafe(self.on_batch_result))
+        self.add_log(f"Fetching info for {len(urls)} URLs...", "info")
+        self.update_status(f"🔍 Fetching info for {len(urls)} URLs...", (0.1, 0.5, 0.8, 1))
+        
+        popup = BatchPopup(self.batch, self.default_policy(), self.download_batch)
+        popup.open()
+    
+    def on_batch_result(self, item):
+        """Log one batch result (called on the event loop)"""
+        if item.state == BatchItem.FAILED:
+            self.add_log(f"Info failed for {item.url[:40]}: {item.error[:60]}", "error")
+        
+        batch = self.batch
+        if batch is not None and item in batch.items and batch.finished:
+            self.add_log(batch.summary(), "success")
+            self.update_status("✅ Batch info fetched", (0.2, 0.6, 0.2, 1))
+    
+    def download_batch(self, batch):
+        """Queue every video of a batch with the default quality policy"""
+        try:
+            self.engine.prepare_download_path()
+        except OSError as e:
+            self.show_popup("Error", f"Cannot create download folder:\n{str(e)}")
+            return
+        
+        policy = self.default_policy()
+        self.engine.submit_batch(batch, policy, self.selected_format)
+        self.add_log(f"Batch of {len(batch.items)} URLs queued ({policy.label}, {self.selected_format.upper()})", "info")
+    
     def start_download(self, instance):
-        """Start download process"""
-        if not self.url_input.text.strip():
-            self.show_popup("Error", "Please enter a YouTube URL.")
+        """Queue a download with the current URL, quality and format"""
+        urls = self.input_urls()
+        if urls is None:
+            return
+        if len(urls) > 1:
+            batch = self.batch
+            if batch is None or batch.urls != urls:
+                batch = self.engine.prefetch_batch(urls, on_result=self.orchestrator.threadsafe(self.on_batch_result))
+                self.batch = batch
+            self.download_batch(batch)
             return
+        url = urls[0]
         
-        if not self.selected_quality:
+        playlist = is_playlist_url(url)
+        if not playlist and not self.selected_quality:
             self.show_popup("Info", "Please select a quality first.")
             return
         
-        # Get download path
-        download_path = self.settings['path']
-        
-        # Create directory
         try:
-            os.makedirs(download_path, exist_ok=True)
-        except Exception as e:
+            if playlist:
+                self.start_playlist(url)
+            elif self.engine.submit(url, self.selected_quality, self.selected_format) is None:
+                self.confirm_popup(
+                    "Already Downloaded",
+                    f"This video is in the download archive as {self.selected_format.upper()}.\n"
+                    f"Download it again?",
+                    "Download Anyway",
+                    functools.partial(self.force_download, url, self.selected_quality, self.selected_format)
+                )
+        except OSError as e:
             self.show_popup("Error", f"Cannot create download folder:\n{str(e)}")
-            return
-        
-        # Disable buttons
-        self.download_btn.disabled = True
-        self.info_btn.disabled = True
-        self.download_btn.text = "[b]⏳ DOWNLOADING...[/b]"
-        
-        # Start download
-        threading.Thread(
-            target=self.download_content,
-            args=(download_path,),
-            daemon=True
-        ).start()
     
-    def download_content(self, download_path):
-        """Download the content"""
+    def force_download(self, url, quality, output_format):
+        """Queue a video even though the archive lists it"""
         try:
-            url = self.url_input.text.strip()
-            
-            # Configure download options
-            if self.selected_format == 'mp3':
-                ydl_opts = {
-                    'format': 'bestaudio/best',
-                    'postprocessors': [{
-                        'key': 'FFmpegExtractAudio',
-                        'preferredcodec': 'mp3',
-                        'preferredquality': '192',
-                    }],
-                    'outtmpl': f'{download_path}/%(title)s.%(ext)s',
-                    'progress_hooks': [self.progress_hook],
-                    'quiet': True,
-                    'no_warnings': True,
-                    'noplaylist': False,
-                }
-            else:
-                ydl_opts = {
-                    'format': self.selected_quality['format_id'],
-                    'merge_output_format': self.selected_format,
-                    'outtmpl': f'{download_path}/%(title)s.%(ext)s',
-                    'progress_hooks': [self.progress_hook],
-                    'quiet': True,
-                    'no_warnings': True,
-                    'noplaylist': False,
-                    'retries': int(self.settings['retry']),
-                }
+            self.engine.submit(url, quality, output_format, force=True)
+        except OSError as e:
+            self.show_popup("Error", f"Cannot create download folder:\n{str(e)}")
+    
+    def start_playlist(self, url):
+        """Stream a playlist into the queue, applying one quality policy to every entry"""
+        policy = self.default_policy()
+        self.engine.submit_playlist(url, policy, self.selected_format)
+        
+        self.add_log(f"Playlist download started ({policy.label}, {self.selected_format.upper()})", "info")
+        self.update_status("📃 Streaming playlist entries...", (0.1, 0.5, 0.8, 1))
+    
+    def on_job_update(self, job):
+        """Handle a job state change (called on the event loop)"""
+        if job.state == DownloadJob.QUEUED and job.downloaded_bytes:
+            # Resumed, or preempted by a more urgent job; continues from its partial file
+            done_mb = job.downloaded_bytes / (1024 * 1024)
+            self.add_log(f"Re-queued #{job.id} at {done_mb:.1f} MB: {job.title[:40]}", "info")
+        elif job.state == DownloadJob.QUEUED:
+            self.add_log(f"Queued #{job.id}: {job.url[:50]}", "info")
+        elif job.state == DownloadJob.RUNNING:
+            self.add_log(f"Started #{job.id}: {job.url[:50]}", "info")
+            self.update_status(f"⬇️ Starting download #{job.id}...", (0.1, 0.5, 0.8, 1))
+        elif job.state == DownloadJob.PROCESSING:
+            self.add_log(f"Processing #{job.id}: {job.title[:50]}", "info")
+        elif job.state == DownloadJob.PAUSED:
+            self.add_log(f"Paused #{job.id}: {job.title[:50]}", "warning")
+            self.update_status(f"⏸ Download #{job.id} paused", (0.8, 0.6, 0.2, 1))
+        elif job.state == DownloadJob.CANCELLED:
+            self.add_log(f"Cancelled #{job.id}: {job.title[:50]}", "warning")
+            self.update_status(f"✖ Download #{job.id} cancelled", (0.5, 0.5, 0.5, 1))
+        elif job.state == DownloadJob.DONE:
+            success_msg = f"[b]✅ Download Complete![/b]\n\n"
+            success_msg += f"📹 Title: {job.title}\n"
+            success_msg += f"📊 Quality: {job.quality['resolution']}\n"
+            success_msg += f"📁 Format: {job.output_format.upper()}\n"
+            success_msg += f"💾 Saved to: {job.download_path}/\n\n"
+            success_msg += "Click OK to continue."
             
-            with youtube_dl.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=True)
-                
-                # Record download
-                download_record = {
-                    'title': info.get('title', 'Unknown'),
-                    'url': url,
-                    'quality': self.selected_quality['resolution'],
-                    'format': self.selected_format,
-                    'path': download_path,
-                    'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    'size': os.path.getsize(f"{download_path}/{info.get('title', 'video')}.{self.selected_format}")
-                }
-                self.download_history.append(download_record)
-                self.save_download_history()
-                
-                # Show success message
-                success_msg = f"[b]✅ Download Complete![/b]\n\n"
-                success_msg += f"📹 Title: {info.get('title', 'Unknown')}\n"
-                success_msg += f"📊 Quality: {self.selected_quality['resolution']}\n"
-                success_msg += f"📁 Format: {self.selected_format.upper()}\n"
-                success_msg += f"💾 Saved to: {download_path}/\n\n"
-                success_msg += "Click OK to continue."
-                
+            # Playlist and batch entries only go to the log
+            if job.batch is None:
                 Clock.schedule_once(lambda dt: self.show_popup("Success", success_msg))
-                
-                self.add_log(f"Download complete: {info.get('title', 'Unknown')[:50]}...", "success")
-                self.update_status("✅ Download completed!", (0.2, 0.6, 0.2, 1))
-                self.update_progress(100)
-                
-        except Exception as e:
-            error_msg = str(e)
-            Clock.schedule_once(lambda dt: self.show_popup(
-                "Download Error", 
-                f"Download failed:\n\n{error_msg}\n\nPlease try again."
-            ))
+            
+            self.add_log(f"Download complete: {job.title[:50]}...", "success")
+            self.update_status("✅ Download completed!", (0.2, 0.6, 0.2, 1))
+            self.update_progress(100)
+        elif job.state == DownloadJob.FAILED:
+            error_msg = job.error
+            if job.batch is None:
+                Clock.schedule_once(lambda dt: self.show_popup(
+                    "Download Error", 
+                    f"Download failed:\n\n{error_msg}\n\nPlease try again."
+                ))
             self.update_status("❌ Download failed", (0.8, 0.2, 0.2, 1))
             self.add_log(f"Download error: {error_msg}", "error")
         
-        finally:
-            # Re-enable buttons
-            Clock.schedule_once(lambda dt: self.enable_buttons())
+        Clock.schedule_once(lambda dt: self.update_queue_button())
+        if job.finished:
             Clock.schedule_once(lambda dt: self.update_stats())
     
-    def progress_hook(self, d):
-        """Handle download progress updates"""
-        if d['status'] == 'downloading':
-            if '_percent_str' in d:
-                percent_str = d['_percent_str'].strip()
-                if '%' in percent_str:
-                    try:
-                        percentage = float(percent_str.replace('%', ''))
-                        self.update_progress(percentage)
-                        
-                        # Get download speed
-                        speed = d.get('speed', 0)
-                        if speed:
-                            speed_mb = speed / (1024 * 1024)
-                            speed_text = f"{speed_mb:.1f} MB/s"
-                        else:
-                            speed_text = "Calculating..."
-                        
-                        # Get ETA
-                        eta = d.get('eta', 0)
-                        if eta:
-                            eta_min = eta // 60
-                            eta_sec = eta % 60
-                            if eta_min > 0:
-                                eta_text = f"{eta_min}m {eta_sec}s"
-                            else:
-                                eta_text = f"{eta_sec}s"
-                        else:
-                            eta_text = "Calculating..."
-                        
-                        status_text = f"⬇️ {percentage:.1f}% | {speed_text} | ETA: {eta_text}"
-                        self.update_status(status_text, (0.1, 0.5, 0.8, 1))
-                        
-                    except:
-                        pass
-        
-        elif d['status'] == 'finished':
-            self.update_status("✅ Processing complete!", (0.2, 0.6, 0.2, 1))
-    
-    def enable_buttons(self):
-        """Re-enable all buttons"""
-        self.download_btn.disabled = False
-        self.info_btn.disabled = False
-        self.download_btn.text = "[b]⬇️ DOWNLOAD NOW[/b]"
+    def publish_progress(self, dt):
+        """Publish the progress merged since the last tick in one UI update"""
+        updates = self.engine.progress_aggregator.drain()
+        if not updates:
+            return
+        
+        finished = []
+        for job_id, fields in updates.items():
+            if fields.get('status') == 'downloading':
+                self.active_progress.setdefault(job_id, {}).update(fields)
+                continue
+            
+            self.active_progress.pop(job_id, None)
+            if fields.get('status') == 'processing':
+                self.active_processing[job_id] = fields
+                continue
+            
+            self.active_processing.pop(job_id, None)
+            if fields.get('status') == 'finished':
+                finished.append(job_id)
+        
+        if not self.active_progress:
+            if self.active_processing:
+                # Downloads are done; show FFmpeg post-processing on its own
+                job_id, fields = next(reversed(self.active_processing.items()))
+                percentage = fields.get('progress') or 0.0
+                self.progress_bar.value = percentage
+                self.percent_label.text = f"{percentage:.1f}%"
+                self.status_label.text = f"⚙️ #{job_id} {fields.get('step') or 'Processing'} {percentage:.0f}%"
+                self.status_label.color = (0.6, 0.4, 0.8, 1)
+                return
+            if not finished:
+                return
+            self.status_label.text = f"✅ #{finished[-1]} processing complete!"
+            self.status_label.color = (0.2, 0.6, 0.2, 1)
+            return
+        
+        downloaded = sum(p['downloaded'] for p in self.active_progress.values())
+        total = sum(p['total'] for p in self.active_progress.values())
+        speed = sum(p['speed'] for p in self.active_progress.values())
+        eta = max(p['eta'] for p in self.active_progress.values())
+        percentage = min(downloaded * 100 / total, 100.0) if total else 0.0
+        
+        # Get download speed
+        if speed:
+            speed_mb = speed / (1024 * 1024)
+            speed_text = f"{speed_mb:.1f} MB/s"
+        else:
+            speed_text = "Calculating..."
+        
+        # Get ETA
+        if eta:
+            eta_min = int(eta) // 60
+            eta_sec = int(eta) % 60
+            if eta_min > 0:
+                eta_text = f"{eta_min}m {eta_sec}s"
+            else:
+                eta_text = f"{eta_sec}s"
+        else:
+            eta_text = "Calculating..."
+        
+        if len(self.active_progress) == 1:
+            label = f"#{next(iter(self.active_progress))}"
+        else:
+            label = f"{len(self.active_progress)} jobs"
+        
+        self.progress_bar.value = percentage
+        self.percent_label.text = f"{percentage:.1f}%"
+        self.status_label.text = f"⬇️ {label} {percentage:.1f}% | {speed_text} | ETA: {eta_text}"
+        self.status_label.color = (0.1, 0.5, 0.8, 1)
+    
+    def update_queue_button(self):
+        """Show how many jobs are active on the queue button"""
+        counts = self.download_queue.counts()
+        active = (counts[DownloadJob.RUNNING] + counts[DownloadJob.QUEUED] + counts[DownloadJob.PROCESSING]
+                  + counts[DownloadJob.PAUSED])
+        self.queue_btn.text = f"📋 Queue: {active}"
     
     def update_progress(self, value):
         """Update progress bar"""
@@ -1120,83 +1805,55 @@ class VideMonApp(App):
         Clock.schedule_once(update)
     
     def add_log(self, message, message_type="info"):
-        """Add message to activity log"""
+        """Add message to activity log (safe to call from any thread)"""
         timestamp = datetime.now().strftime("%H:%M:%S")
+        self.log_buffer.append(timestamp, message_type, message)
+        self.flush_log_trigger()
+    
+    def flush_log(self, dt):
+        """Append records logged since the last flush to the recycled log view"""
+        if self.log_view is None:
+            return
         
-        # Define colors for different message types
-        colors = {
-            "error": (0.8, 0.2, 0.2, 1),
-            "success": (0.2, 0.6, 0.2, 1),
-            "warning": (0.9, 0.6, 0.1, 1),
-            "info": (0.3, 0.3, 0.3, 1)
-        }
-        
-        # Define icons for different message types
-        icons = {
-            "error": "❌",
-            "success": "✅",
-            "warning": "⚠️",
-            "info": "ℹ️"
-        }
-        
-        color = colors.get(message_type, (0.3, 0.3, 0.3, 1))
-        icon = icons.get(message_type, "ℹ️")
-        
-        def update_log(dt):
-            log_entry = BoxLayout(size_hint_y=None, height=dp(25), spacing=dp(5))
-            
-            # Timestamp
-            time_label = Label(
-                text=f"[color=666666]{timestamp}[/color]",
-                size_hint_x=0.25,
-                font_size='10sp',
-                markup=True
-            )
-            log_entry.add_widget(time_label)
-            
-            # Icon
-            icon_label = Label(
-                text=icon,
-                size_hint_x=0.1,
-                font_size='12sp'
-            )
-            log_entry.add_widget(icon_label)
-            
-            # Message
-            msg_label = Label(
-                text=message,
-                size_hint_x=0.65,
-                font_size='11sp',
-                color=color,
-                halign='left',
-                text_size=(dp(250), None)
-            )
-            msg_label.bind(size=msg_label.setter('text_size'))
-            log_entry.add_widget(msg_label)
-            
-            self.log_layout.add_widget(log_entry)
-            
-            # Keep only last 20 log entries
-            if len(self.log_layout.children) > 20:
-                self.log_layout.remove_widget(self.log_layout.children[-1])
+        records, self.log_seq = self.log_buffer.since(self.log_seq)
+        if not records:
+            return
         
-        Clock.schedule_once(update_log)
+        rows = []
+        for timestamp, message_type, message in records:
+            rows.append({
+                'timestamp': timestamp,
+                'icon': LOG_ICONS.get(message_type, "ℹ️"),
+                'message': message,
+                'color': LOG_COLORS.get(message_type, (0.3, 0.3, 0.3, 1))
+            })
+        
+        # Follow the newest entries unless the user scrolled up
+        follow = self.log_view.scroll_y <= 0.05 or self.log_view.height >= self.log_view.layout_manager.height
+        
+        data = self.log_view.data
+        data.extend(rows)
+        overflow = len(data) - self.log_buffer.capacity
+        if overflow > 0:
+            del data[:overflow]
+        
+        if follow:
+            self.log_view.scroll_y = 0
     
     def clear_log(self, instance):
         """Clear activity log"""
-        self.log_layout.clear_widgets()
+        self.log_buffer.clear()
+        self.log_view.data = []
         self.add_log("Log cleared", "info")
     
+    def refresh_storage(self):
+        """Rescan what changed in the download folder, then update the stats"""
+        self.engine.refresh_storage(on_done=lambda total_bytes: Clock.schedule_once(lambda dt: self.update_stats()))
+    
     def update_stats(self):
         """Update download statistics"""
-        total_downloads = len(self.download_history)
-        
-        # Calculate total storage used
-        total_size = 0
-        for download in self.download_history:
-            total_size += download.get('size', 0)
-        
-        total_size_mb = total_size / (1024 * 1024)
+        total_downloads = self.engine.history.count
+        total_size_mb = self.engine.folder_index.total_bytes / (1024 * 1024)
         
         self.stats_label.text = f"📥 Downloads: {total_downloads} | 💾 Storage: {total_size_mb:.1f} MB"
     
@@ -1209,34 +1866,35 @@ class VideMonApp(App):
         )
         popup.open()
     
-    def load_settings(self):
-        """Load settings from file"""
-        try:
-            if os.path.exists('videmon_settings.json'):
-                with open('videmon_settings.json', 'r') as f:
-                    self.settings = json.load(f)
-            
-            if os.path.exists('videmon_history.json'):
-                with open('videmon_history.json', 'r') as f:
-                    self.download_history = json.load(f)
-        except:
-            pass
-    
-    def save_settings(self):
-        """Save settings to file"""
-        try:
-            with open('videmon_settings.json', 'w') as f:
-                json.dump(self.settings, f)
-        except:
-            pass
-    
-    def save_download_history(self):
-        """Save download history"""
-        try:
-            with open('videmon_history.json', 'w') as f:
-                json.dump(self.download_history, f)
-        except:
-            pass
+    def confirm_popup(self, title, content, confirm_text, on_confirm):
+        """Ask before an action; on_confirm() runs if the user confirms"""
+        popup = Popup(title=title, size_hint=(0.85, 0.5))
+        layout = BoxLayout(orientation='vertical', padding=dp(10), spacing=dp(10))
+        layout.add_widget(Label(text=content, markup=True, halign='center'))
+        
+        btn_layout = BoxLayout(size_hint_y=0.3, spacing=dp(10))
+        
+        confirm_btn = Button(
+            text=f"[b]{confirm_text}[/b]",
+            background_color=(0.1, 0.5, 0.8, 1),
+            color=(1, 1, 1, 1),
+            markup=True
+        )
+        confirm_btn.bind(on_press=lambda x: (popup.dismiss(), on_confirm()))
+        btn_layout.add_widget(confirm_btn)
+        
+        cancel_btn = Button(
+            text="[b]Cancel[/b]",
+            background_color=(0.8, 0.2, 0.2, 1),
+            color=(1, 1, 1, 1),
+            markup=True
+        )
+        cancel_btn.bind(on_press=popup.dismiss)
+        btn_layout.add_widget(cancel_btn)
+        
+        layout.add_widget(btn_layout)
+        popup.content = layout
+        popup.open()
 
 if __name__ == '__main__':
-    VideMonApp().run()
\ No newline at end of file
+    asyncio.run(VideMonApp().async_run(async_lib='asyncio'))
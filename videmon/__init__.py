@@ -0,0 +1,12 @@
+"""VideMon download engine, usable without the Kivy app
+
+Run ``python -m videmon`` for the command line client.
+"""
+__version__ = '1.0'
+
+from .engine import DownloadEngine
+from .formats import FormatIndex, FormatPolicy, FormatRecord
+from .jobs import DownloadJob, DownloadQueue, JobSpec
+from .orchestrator import Orchestrator
+from .summary import VideoSummary
+from .utils import canonical_video_id, is_playlist_url, video_key
@@ -0,0 +1,143 @@
+"""Command line client: downloads the URLs given as arguments, in a file or on stdin"""
+import sys
+import time
+import argparse
+import threading
+
+from .batch import BatchItem
+from .engine import DownloadEngine
+from .formats import FormatPolicy, CODEC_PATTERNS
+from .jobs import DownloadJob
+from .transfer import PROGRESS_RATE
+from .utils import read_urls
+
+class ConsoleReporter:
+    """Prints engine logs and job changes, with a live progress line on terminals"""
+    def __init__(self, stream=sys.stderr):
+        self.stream = stream
+        self.live = stream.isatty()
+        self.active_progress = {}
+        self._lock = threading.Lock()
+    
+    def log(self, message, message_type="info"):
+        self._write(f"[{message_type}] {message}")
+    
+    def job_update(self, job):
+        if job.state == DownloadJob.RUNNING:
+            self.log(f"Started #{job.id}: {job.title[:60]}")
+        elif job.state == DownloadJob.PROCESSING:
+            self.log(f"Processing #{job.id}: {job.title[:60]}")
+        elif job.state == DownloadJob.DONE:
+            self.log(f"Download complete #{job.id}: {job.title[:60]}", "success")
+        elif job.state == DownloadJob.FAILED:
+            self.log(f"Download failed #{job.id}: {job.error}", "error")
+        elif job.state == DownloadJob.PAUSED:
+            self.log(f"Paused #{job.id}: {job.title[:60]}")
+        elif job.state == DownloadJob.CANCELLED:
+            self.log(f"Cancelled #{job.id}: {job.title[:60]}", "warning")
+    
+    def batch_item(self, item):
+        if item.state == BatchItem.FAILED:
+            self.log(f"Skipped {item.url[:60]}: {item.error}", "error")
+        elif item.state == BatchItem.SKIPPED:
+            self.log(f"Already downloaded or queued, skipped: {item.url[:60]}", "info")
+    
+    def progress(self, updates):
+        """Fold drained progress updates in and redraw the progress line"""
+        for job_id, fields in updates.items():
+            if fields.get('status') == 'downloading':
+                self.active_progress.setdefault(job_id, {}).update(fields)
+            else:
+                self.active_progress.pop(job_id, None)
+        
+        if not self.live or not self.active_progress:
+            return
+        
+        downloaded = sum(p['downloaded'] for p in self.active_progress.values())
+        total = sum(p['total'] for p in self.active_progress.values())
+        speed = sum(p['speed'] for p in self.active_progress.values())
+        percentage = min(downloaded * 100 / total, 100.0) if total else 0.0
+        with self._lock:
+            self.stream.write(f"\r\033[K{len(self.active_progress)} active | {percentage:.1f}% | "
+                              f"{speed / (1024 * 1024):.1f} MB/s")
+            self.stream.flush()
+    
+    def _write(self, line):
+        with self._lock:
+            prefix = "\r\033[K" if self.live else ""
+            self.stream.write(f"{prefix}{line}\n")
+            self.stream.flush()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m videmon',
+        description="Download YouTube videos and playlists without the app. "
+                    "Downloads interrupted in an earlier run are resumed first."
+    )
+    parser.add_argument('urls', nargs='*', help="video or playlist URLs; read from --input or stdin if none")
+    parser.add_argument('-i', '--input', help="file with URLs, one or more per line ('-' for stdin)")
+    parser.add_argument('-f', '--format', choices=('mp4', 'mp3', 'webm'), default='mp4', help="output format")
+    parser.add_argument('-q', '--max-height', type=int, help="highest video resolution, e.g. 720 (default: best)")
+    parser.add_argument('--max-size', type=int, help="largest download in MB (default: the app's setting)")
+    parser.add_argument('--force', action='store_true',
+                        help="download videos again even if the archive lists them")
+    parser.add_argument('--codec', choices=('any',) + tuple(CODEC_PATTERNS),
+                        help="preferred video codec (default: the app's setting)")
+    parser.add_argument('-o', '--output', help="download folder (default: the app's download path)")
+    parser.add_argument('-j', '--jobs', type=int, help="concurrent downloads (default: the app's setting)")
+    parser.add_argument('--data-dir', default='', help="folder with the settings, history, journal and cache")
+    parser.add_argument('--metrics-port', type=int, help="serve Prometheus metrics on 127.0.0.1:PORT/metrics")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    
+    urls = list(args.urls)
+    if args.input and args.input != '-':
+        with open(args.input, 'r') as f:
+            urls.extend(read_urls(f))
+    elif args.input == '-' or not urls:
+        urls.extend(read_urls(sys.stdin))
+    
+    reporter = ConsoleReporter()
+    engine = DownloadEngine(args.data_dir, on_log=reporter.log, on_job_update=reporter.job_update)
+    if args.output:
+        engine.settings['path'] = args.output
+    if args.jobs:
+        engine.download_queue.set_max_workers(args.jobs)
+    if args.metrics_port:
+        engine.serve_metrics(args.metrics_port)
+    
+    engine.resume_journaled_jobs()
+    
+    if args.max_size is not None:
+        engine.settings['max_size_mb'] = str(args.max_size)
+    if args.codec:
+        engine.settings['preferred_codec'] = args.codec
+    policy = FormatPolicy.from_settings(engine.settings, args.max_height, args.format)
+    try:
+        engine.prepare_download_path()
+    except OSError as e:
+        reporter.log(f"Cannot create download folder: {e}", "error")
+        return 2
+    
+    # Metadata for all URLs is fetched concurrently; each video is queued once its formats are known
+    # Videos already in the archive or the queue are skipped before any extraction
+    batch = engine.prefetch_batch(urls, on_result=reporter.batch_item, output_format=args.format,
+                                  force=args.force)
+    engine.submit_batch(batch, policy, args.format, force=args.force)
+    
+    try:
+        while engine.busy():
+            time.sleep(1 / PROGRESS_RATE)
+            reporter.progress(engine.progress_aggregator.drain())
+    except KeyboardInterrupt:
+        reporter.log("Interrupted; unfinished downloads resume on the next run", "warning")
+        return 130
+    
+    reporter.log(engine.download_queue.summary())
+    failed = engine.download_queue.counts()[DownloadJob.FAILED] + batch.counts()[BatchItem.FAILED]
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""Archive of downloaded videos, checked before any extraction"""
+import os
+import threading
+import yt_dlp as youtube_dl
+
+from .utils import canonical_video_id
+
+ARCHIVE_FILE = 'videmon_archive.txt'
+
+def archive_key(extractor, video_id, output_format):
+    """Canonical archive key, like yt-dlp's "<extractor> <id>" plus the output format"""
+    return f'{extractor.lower()} {video_id} {output_format}'
+
+def extractor_classes():
+    """yt-dlp's extractors in matching order, including plugins"""
+    try:
+        from yt_dlp.plugins import all_plugins_loaded, load_all_plugins
+    except ImportError:
+        pass  # Older yt-dlp loads plugin extractors on import
+    else:
+        # YoutubeDL() loads plugins on first use; URLs may be matched before that
+        if not all_plugins_loaded.value:
+            load_all_plugins()
+    return youtube_dl.extractor.gen_extractor_classes()
+
+def url_archive_id(url):
+    """Return (extractor, video ID) for a URL without network access, or None"""
+    video_id = canonical_video_id(url)
+    if video_id:
+        return 'youtube', video_id
+    
+    # Same URL matching yt-dlp does before extracting; the generic extractor has no stable IDs
+    for ie in extractor_classes():
+        if ie.ie_key() != 'Generic' and ie.suitable(url):
+            try:
+                video_id = ie.get_temp_id(url)
+            except Exception:
+                return None
+            return (ie.ie_key(), video_id) if video_id else None
+    return None
+
+def info_archive_id(info):
+    """Return (extractor, video ID) for an info dict or flat playlist entry, or None"""
+    extractor = info.get('extractor_key') or info.get('ie_key')
+    video_id = info.get('id')
+    if extractor and video_id:
+        return extractor, video_id
+    return None
+
+class DownloadArchive:
+    """Persistent set of archive keys of finished downloads
+    
+    The file has one key per line and is only ever appended to; it is
+    read into a set at startup so lookups don't depend on its length.
+    """
+    def __init__(self, path=ARCHIVE_FILE):
+        self.path = path
+        self.exists = os.path.exists(path)
+        self._keys = set()
+        self._lock = threading.Lock()
+        self._load()
+    
+    def __contains__(self, key):
+        return key in self._keys
+    
+    def __len__(self):
+        return len(self._keys)
+    
+    def add(self, key):
+        """Durably record one key"""
+        self.add_many([key])
+    
+    def add_many(self, keys):
+        with self._lock:
+            new = [key for key in dict.fromkeys(keys) if key not in self._keys]
+            if not new:
+                return
+            try:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(''.join(key + '\n' for key in new))
+                    f.flush()
+                    os.fsync(f.fileno())
+            except OSError:
+                pass
+            self._keys.update(new)
+            self.exists = True
+    
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._keys = {line.strip() for line in f if line.strip()}
+        except OSError:
+            self._keys = set()
@@ -0,0 +1,140 @@
+"""Batches of URLs with concurrent metadata prefetch"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .utils import is_playlist_url, video_key
+
+# Metadata extractions running at once for one batch
+PREFETCH_WORKERS = 4
+
+class BatchItem:
+    """One URL of a batch and what its metadata fetch returned"""
+    FETCHING = 'fetching'
+    READY = 'ready'
+    FAILED = 'failed'
+    QUEUED = 'queued'
+    SKIPPED = 'skipped'  # Already downloaded or queued; never fetched
+    
+    def __init__(self, url):
+        self.url = url
+        self.playlist = is_playlist_url(url)
+        self.title = url
+        self.state = BatchItem.FETCHING
+        self.summary = None  # VideoSummary from fetch, with the format list
+        self.info = None     # Trimmed info dict until queued, unless the summary came from the cache
+        self.extract_seconds = 0.0
+        self.cached = False
+        self.error = None
+
+class MetadataBatch:
+    """Fetches metadata for many URLs on a bounded thread pool
+    
+    Each result goes to on_result(item) as soon as it arrives, in
+    completion order. Playlists are not fetched here; they stream their
+    own entries once queued. Videos for which skip(url) is true are
+    passed over without being fetched. After queue_all(submit), every
+    item is handed to submit(item) as soon as it is ready.
+    """
+    def __init__(self, urls, fetch, max_workers=PREFETCH_WORKERS, on_result=None, skip=None):
+        self.fetch = fetch
+        self.on_result = on_result
+        self.urls = list(urls)
+        # The same video through different URL shapes is fetched once
+        self.items = []
+        seen = set()
+        for url in urls:
+            if video_key(url) not in seen:
+                seen.add(video_key(url))
+                self.items.append(BatchItem(url))
+        self._submit = None
+        self._handing_off = 0  # Items claimed for submit() that it hasn't returned from
+        self._lock = threading.Lock()
+        
+        executor = ThreadPoolExecutor(max_workers=max(1, int(max_workers)))
+        for item in self.items:
+            if item.playlist:
+                item.state = BatchItem.READY
+            elif skip and skip(item.url):
+                item.state = BatchItem.SKIPPED
+                if on_result:
+                    on_result(item)
+            else:
+                executor.submit(self._fetch, item)
+        executor.shutdown(wait=False)
+    
+    @property
+    def finished(self):
+        """True once every item has been fetched or has failed"""
+        return all(item.state != BatchItem.FETCHING for item in self.items)
+    
+    @property
+    def pending(self):
+        """True while queue_all() is waiting for items still being fetched or submitted"""
+        with self._lock:
+            return self._submit is not None and (not self.finished or self._handing_off > 0)
+    
+    def counts(self):
+        counts = dict.fromkeys((BatchItem.FETCHING, BatchItem.READY, BatchItem.FAILED, BatchItem.QUEUED,
+                                BatchItem.SKIPPED), 0)
+        for item in self.items:
+            counts[item.state] += 1
+        return counts
+    
+    def summary(self):
+        counts = self.counts()
+        return (f"{len(self.items)} URLs | {counts[BatchItem.FETCHING]} fetching | "
+                f"{counts[BatchItem.READY]} ready | {counts[BatchItem.QUEUED]} queued | "
+                f"{counts[BatchItem.SKIPPED]} skipped | {counts[BatchItem.FAILED]} failed")
+    
+    def queue_all(self, submit):
+        """Hand every ready item to submit now and the rest as they arrive"""
+        with self._lock:
+            self._submit = submit
+        for item in self.items:
+            with self._lock:
+                claimed = self._claim(item)
+            if claimed:
+                self._hand_off(item, claimed)
+    
+    def _fetch(self, item):
+        try:
+            summary, info, seconds = self.fetch(item.url)
+        except Exception as e:
+            item.error = str(e)
+            item.state = BatchItem.FAILED
+        else:
+            item.summary = summary
+            item.info = info
+            item.extract_seconds = seconds
+            item.cached = info is None
+            item.title = summary.title or item.url
+            # Ready and claimed at once, so the batch never looks finished with nothing handed off
+            with self._lock:
+                item.state = BatchItem.READY
+                claimed = self._claim(item)
+            if claimed:
+                self._hand_off(item, claimed)
+        
+        if self.on_result:
+            self.on_result(item)
+    
+    def _claim(self, item):
+        # Caller must hold the lock; returns the submit function if the item is now this caller's to hand off
+        if self._submit is None or item.state != BatchItem.READY:
+            return None
+        # Claimed here so queue_all() and the fetch thread can't both submit it
+        item.state = BatchItem.QUEUED
+        self._handing_off += 1
+        return self._submit
+    
+    def _hand_off(self, item, submit):
+        try:
+            submit(item)
+        except Exception as e:
+            item.error = str(e)
+            item.state = BatchItem.FAILED
+        finally:
+            with self._lock:
+                self._handing_off -= 1
+        # The queued job holds the info now
+        item.info = None
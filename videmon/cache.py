@@ -0,0 +1,128 @@
+"""Persistent cache of extracted video summaries"""
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+METADATA_CACHE_DIR = 'videmon_cache'
+METADATA_CACHE_TTL = 24 * 60 * 60
+METADATA_CACHE_MAX_ENTRIES = 500
+
+class MetadataCache:
+    """Persistent LRU cache of video summaries keyed by canonical video ID
+    
+    Each entry is a small JSON file; file mtimes keep the LRU order across
+    restarts. Concurrent lookups of the same ID share a single extraction.
+    """
+    def __init__(self, directory, ttl=METADATA_CACHE_TTL, max_entries=METADATA_CACHE_MAX_ENTRIES):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._index = OrderedDict()  # video_id -> last use, oldest first
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._load_index()
+    
+    def get(self, video_id):
+        """Return the cached entry, or None if missing or expired"""
+        with self._lock:
+            if video_id not in self._index:
+                return None
+            self._index.move_to_end(video_id)
+        
+        path = self._entry_path(video_id)
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._discard(video_id)
+            return None
+        
+        if time.time() - entry.get('fetched_at', 0) > self.ttl:
+            self._discard(video_id)
+            return None
+        
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+    
+    def put(self, video_id, entry):
+        """Store an entry and evict the least recently used ones over capacity"""
+        entry = dict(entry, fetched_at=time.time())
+        path = self._entry_path(video_id)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(path + '.tmp', 'w') as f:
+                json.dump(entry, f)
+            os.replace(path + '.tmp', path)
+        except OSError:
+            return
+        
+        with self._lock:
+            self._index[video_id] = time.time()
+            self._index.move_to_end(video_id)
+            evicted = []
+            while len(self._index) > self.max_entries:
+                evicted.append(self._index.popitem(last=False)[0])
+        
+        for old_id in evicted:
+            self._remove_file(old_id)
+    
+    def get_or_fetch(self, video_id, fetch):
+        """Return the cached entry or run fetch() once for all concurrent callers"""
+        entry = self.get(video_id)
+        if entry is not None:
+            return entry
+        
+        with self._lock:
+            future = self._inflight.get(video_id)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[video_id] = future
+        
+        if not owner:
+            return future.result()
+        
+        try:
+            entry = fetch()
+            self.put(video_id, entry)
+            future.set_result(entry)
+            return entry
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[video_id]
+    
+    def _entry_path(self, video_id):
+        return os.path.join(self.directory, f"{video_id}.json")
+    
+    def _load_index(self):
+        try:
+            entries = [
+                (entry.stat().st_mtime, entry.name[:-len('.json')])
+                for entry in os.scandir(self.directory)
+                if entry.name.endswith('.json')
+            ]
+        except OSError:
+            return
+        
+        for mtime, video_id in sorted(entries):
+            self._index[video_id] = mtime
+    
+    def _discard(self, video_id):
+        with self._lock:
+            self._index.pop(video_id, None)
+        self._remove_file(video_id)
+    
+    def _remove_file(self, video_id):
+        try:
+            os.remove(self._entry_path(video_id))
+        except OSError:
+            pass
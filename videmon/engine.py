@@ -0,0 +1,549 @@
+"""Headless download engine shared by the app and the command line"""
+import os
+import glob
+import time
+import threading
+from datetime import datetime
+import yt_dlp as youtube_dl
+
+from . import __version__
+from .batch import MetadataBatch, PREFETCH_WORKERS
+from .archive import DownloadArchive, archive_key, info_archive_id, url_archive_id, ARCHIVE_FILE
+from .cache import MetadataCache, METADATA_CACHE_DIR
+from .formats import FormatIndex
+from .history import HistoryStore, HISTORY_FILE, HISTORY_TOTALS_FILE, LEGACY_HISTORY_FILE
+from .jobs import DownloadJob, DownloadQueue, JobJournal, JOB_JOURNAL_FILE
+from .metrics import (MetricsRegistry, MetricsServer, RetryCountingLogger, postprocessor_phase,
+                      METRICS_FILE)
+from .playlist import PlaylistPipeline
+from .postprocess import BeforeDownloadPP, PostProcessPool, DEFAULT_PROCESSORS
+from .sessions import SessionPool
+from .settings import load_settings, save_settings, SETTINGS_FILE
+from .storage import FolderIndex, SpaceBudget, estimate_output_size, preallocate, FOLDER_INDEX_FILE
+from .summary import VideoSummary
+from .transfer import (ConnectionBudget, BandwidthGovernor, ProgressAggregator,
+                       DEFAULT_FRAGMENTS, MAX_CONNECTIONS)
+from .utils import canonical_video_id, stream_urls_expired, trim_info, video_key
+
+# Seconds between free-space checks while a job waits for other jobs' reservations
+SPACE_WAIT = 5
+
+class JobInterrupted(youtube_dl.utils.DownloadCancelled):
+    """Raised from the progress hook to stop a job that was paused, preempted or cancelled"""
+
+class DownloadEngine:
+    """Settings, video info, the download queue and history, without any UI
+    
+    Clients observe the engine through two optional callbacks, both called
+    from worker threads: on_log(message, message_type) and on_job_update(job).
+    Merged download progress is read from progress_aggregator.
+    """
+    def __init__(self, data_dir='', on_log=None, on_job_update=None):
+        self.data_dir = data_dir
+        self.on_log = on_log
+        self.on_job_update = on_job_update
+        if data_dir:
+            os.makedirs(data_dir, exist_ok=True)
+        self.settings_path = os.path.join(data_dir, SETTINGS_FILE)
+        self.settings = load_settings(self.settings_path)
+        
+        self.metadata_cache = MetadataCache(os.path.join(data_dir, METADATA_CACHE_DIR))
+        self.history = HistoryStore(
+            os.path.join(data_dir, HISTORY_FILE),
+            os.path.join(data_dir, HISTORY_TOTALS_FILE),
+            os.path.join(data_dir, LEGACY_HISTORY_FILE)
+        )
+        self.job_journal = JobJournal(os.path.join(data_dir, JOB_JOURNAL_FILE))
+        self.archive = DownloadArchive(os.path.join(data_dir, ARCHIVE_FILE))
+        if not self.archive.exists:
+            self.seed_archive()
+        # Storage stats, loaded from the last scan until refresh_storage() brings them up to date
+        self.folder_index = FolderIndex(self.settings['path'], os.path.join(data_dir, FOLDER_INDEX_FILE))
+        self.progress_aggregator = ProgressAggregator()
+        # YoutubeDL instances, with their connections, reused across fetches and downloads
+        self.sessions = SessionPool()
+        self.space_budget = SpaceBudget()
+        self.connection_budget = ConnectionBudget(int(self.settings.get('max_connections', MAX_CONNECTIONS)))
+        self.bandwidth_governor = BandwidthGovernor(int(self.settings.get('bandwidth_limit', '0')) * 1024)
+        
+        # Download queue sized from the concurrent downloads setting
+        self.download_queue = DownloadQueue(
+            self.download_content,
+            self.settings.get('concurrent', '1'),
+            on_update=self._on_job_update
+        )
+        # FFmpeg post-processing runs in its own pool so downloads keep their slots
+        self.postprocess_pool = PostProcessPool(self.settings.get('processors', DEFAULT_PROCESSORS))
+        self.playlists = []
+        self.batches = []
+        
+        # Aggregated job metrics, exported as a Prometheus text file and optionally over HTTP
+        self.metrics = MetricsRegistry(__version__)
+        self.metrics_path = os.path.join(data_dir, METRICS_FILE)
+        self.metrics_server = None
+        metrics_port = int(self.settings.get('metrics_port', 0))
+        if metrics_port:
+            self.serve_metrics(metrics_port)
+        
+        # (video key, full info, extraction seconds) of the last extraction, reused by the next download
+        self._extracted = (None, None, 0.0)
+    
+    def apply_settings(self, settings):
+        """Merge, save and apply changed settings to the running engine"""
+        self.settings.update(settings)
+        save_settings(self.settings, self.settings_path)
+        self.download_queue.set_max_workers(self.settings.get('concurrent', '1'))
+        self.postprocess_pool.set_max_workers(self.settings.get('processors', DEFAULT_PROCESSORS))
+        self.bandwidth_governor.set_limit(int(self.settings.get('bandwidth_limit', '0')) * 1024)
+        if os.path.abspath(self.settings['path']) != self.folder_index.root:
+            self.folder_index = FolderIndex(self.settings['path'], self.folder_index.path)
+    
+    def fetch_info(self, url):
+        """Return (summary, cached) for a video URL; blocks while extracting"""
+        summary, info, seconds = self.extract(url)
+        
+        # Keep the trimmed info so the download can skip re-extraction
+        if info is not None:
+            self._extracted = (video_key(url), info, seconds)
+        
+        return summary, info is None
+    
+    def extract(self, url):
+        """Return (summary, info, seconds) for a video URL
+        
+        The summary is a VideoSummary. info is the trimmed info dict kept for
+        the download, or None if the summary was cached.
+        """
+        raw_info = []
+        started = time.monotonic()
+        
+        def extract():
+            with self.sessions.session('info') as ydl:
+                info = ydl.extract_info(url, download=False)
+                info.setdefault('epoch', int(time.time()))
+                raw_info.append(trim_info(info))
+                return VideoSummary.from_info(info, url).to_dict()
+        
+        video_id = canonical_video_id(url)
+        if video_id:
+            entry = self.metadata_cache.get_or_fetch(video_id, extract)
+        else:
+            entry = extract()
+        
+        return VideoSummary.from_dict(entry), raw_info[0] if raw_info else None, time.monotonic() - started
+    
+    def submit(self, url, quality, output_format, force=False, info=None, extract_seconds=0.0, batch=None):
+        """Queue a single video download; raises OSError if the folder can't be created
+        
+        Returns None if the archive lists the video (unless force is set), or
+        the already queued job if the same video is in the queue. Without an
+        info dict, the one from the last fetch_info() is reused if it matches.
+        batch names the URL batch the video was queued from, if any.
+        """
+        download_path = self.prepare_download_path()
+        
+        extracted_key, extracted_info, extracted_seconds = self._extracted
+        reused = info is None and video_key(url) == extracted_key
+        if reused:
+            info, extract_seconds = extracted_info, extracted_seconds
+        archive_id = info_archive_id(info) if info else url_archive_id(url)
+        key = archive_key(*archive_id, output_format) if archive_id else None
+        if key in self.archive and not force:
+            title = (info.get('title') if info else None) or url
+            self._log(f"Already downloaded as {output_format.upper()}, skipped: {title[:50]}", "info")
+            return None
+        if reused:
+            # The job holds the info from here; don't keep a second reference
+            self._extracted = (None, None, 0.0)
+        
+        # Snapshot the current settings so later changes don't affect this job
+        job = DownloadJob(
+            url,
+            quality,
+            output_format,
+            download_path,
+            int(self.settings.get('retry', '3')),
+            info=info,
+            **self.transfer_options()
+        )
+        job.archive_key = key
+        job.batch = batch
+        if job.info is not None:
+            job.title = job.info.get('title') or url
+            job.timings.add('extract', extract_seconds)
+        
+        queued = self.download_queue.submit(job)
+        if queued is not job:
+            self._log(f"Already in the queue as #{queued.id}: {queued.title[:50]}", "info")
+        return queued
+    
+    def submit_playlist(self, url, policy, output_format, force=False):
+        """Stream a playlist into the queue; the FormatPolicy picks each entry's formats
+        
+        Entries in the archive (unless force is set) or already in the queue
+        are skipped without being extracted.
+        """
+        download_path = self.prepare_download_path()
+        retries = int(self.settings.get('retry', '3'))
+        transfer_options = self.transfer_options()
+        
+        def make_job(entry_url, info):
+            format_spec, label = policy.resolve(FormatIndex(info.get('formats') or []))
+            quality = {'format_id': format_spec, 'resolution': label}
+            job = DownloadJob(entry_url, quality, output_format, download_path, retries, info=info,
+                              **transfer_options)
+            archive_id = info_archive_id(info)
+            job.archive_key = archive_key(*archive_id, output_format) if archive_id else None
+            return job
+        
+        def skip(archive_id):
+            return self.already_have(archive_id, output_format, force)
+        
+        pipeline = PlaylistPipeline(url, make_job, self.download_queue, self.sessions, on_log=self._log,
+                                    skip=skip)
+        self.playlists = [p for p in self.playlists if not p.finished] + [pipeline]
+        pipeline.start()
+        return pipeline
+    
+    def prefetch_batch(self, urls, on_result=None, output_format=None, force=False):
+        """Start fetching metadata for many URLs at once; on_result(item) streams each result
+        
+        With an output_format, videos the archive lists in that format (unless
+        force is set) or already in the queue are skipped without extraction.
+        """
+        skip = None
+        if output_format:
+            def skip(url):
+                archive_id = url_archive_id(url)
+                return archive_id is not None and self.already_have(archive_id, output_format, force)
+        
+        batch = MetadataBatch(
+            urls,
+            self.extract,
+            int(self.settings.get('prefetch_workers', PREFETCH_WORKERS)),
+            on_result=on_result,
+            skip=skip
+        )
+        self.batches = [b for b in self.batches if not b.finished] + [batch]
+        return batch
+    
+    def submit_batch(self, batch, policy, output_format, force=False):
+        """Queue every item of a batch as soon as it is ready; the FormatPolicy picks each video's formats"""
+        title = f"Batch of {len(batch.items)} URLs"
+        
+        def submit(item):
+            if item.playlist:
+                self.submit_playlist(item.url, policy, output_format, force)
+                return
+            format_spec, label = policy.resolve(FormatIndex(item.summary.formats))
+            quality = {'format_id': format_spec, 'resolution': label}
+            self.submit(item.url, quality, output_format, force, item.info, item.extract_seconds, title)
+        
+        batch.queue_all(submit)
+    
+    def already_have(self, archive_id, output_format, force=False):
+        """Check whether a video is in the archive in this format (unless force is set) or in the queue"""
+        key = archive_key(*archive_id, output_format)
+        return (key in self.archive and not force) or self.download_queue.find(key) is not None
+    
+    def prepare_download_path(self):
+        """Create the download folder from the settings and return it"""
+        download_path = self.settings['path']
+        os.makedirs(download_path, exist_ok=True)
+        return download_path
+    
+    def transfer_options(self):
+        """Fragment and chunk settings snapshotted into each new job"""
+        return {
+            'fragments': int(self.settings.get('fragments', DEFAULT_FRAGMENTS)),
+            'chunk_size': int(self.settings.get('chunk_size', '0')) * 1024 * 1024
+        }
+    
+    def refresh_storage(self, on_done=None):
+        """Update the download folder index in the background; on_done(total_bytes) runs on its thread"""
+        folder_index = self.folder_index
+        
+        def refresh():
+            total_bytes = folder_index.refresh()
+            if on_done:
+                on_done(total_bytes)
+        
+        threading.Thread(target=refresh, daemon=True).start()
+    
+    def seed_archive(self):
+        """Fill a new archive from the download history"""
+        keys = []
+        for record in self.history.records():
+            archive_id = url_archive_id(record.get('url') or '')
+            if archive_id and record.get('format'):
+                keys.append(archive_key(*archive_id, record['format']))
+        self.archive.add_many(keys)
+    
+    def resume_journaled_jobs(self):
+        """Re-queue jobs from the journal; yt-dlp continues their .part files"""
+        for record in self.job_journal.take_pending():
+            try:
+                job = DownloadJob.from_record(record)
+            except (KeyError, TypeError):
+                continue
+            
+            done_mb = job.downloaded_bytes / (1024 * 1024)
+            if record.get('paused'):
+                self._log(f"Paused download restored: {job.title[:40]} ({done_mb:.1f} MB done)", "info")
+            else:
+                self._log(f"Resuming interrupted download: {job.title[:40]} ({done_mb:.1f} MB done)", "warning")
+            self.download_queue.submit(job, paused=record.get('paused', False))
+    
+    def busy(self):
+        """Check whether any job is queued, running or processing, or a playlist is still being read"""
+        counts = self.download_queue.counts()
+        if counts[DownloadJob.QUEUED] or counts[DownloadJob.RUNNING] or counts[DownloadJob.PROCESSING]:
+            return True
+        return any(not p.finished for p in self.playlists) or any(b.pending for b in self.batches)
+    
+    def serve_metrics(self, port):
+        """Serve the metrics at http://127.0.0.1:<port>/metrics until the process exits"""
+        try:
+            self.metrics_server = MetricsServer(self.render_metrics, port)
+        except OSError as e:
+            self._log(f"Metrics endpoint unavailable on port {port}: {e}", "warning")
+            return
+        self.metrics_server.start()
+    
+    def render_metrics(self):
+        return self.metrics.render(self.download_queue.counts())
+    
+    def download_content(self, job):
+        """Download a queued job (runs on a queue worker thread)"""
+        job.timings.add('queue', time.monotonic() - job.queued_at)
+        
+        # Take this job's share of the global connection cap
+        fragments = self.connection_budget.acquire(job.fragments, self.download_queue.max_workers)
+        self.bandwidth_governor.register(job.id, job.weight)
+        try:
+            ydl, info = self.download_job(job, fragments)
+        finally:
+            self.bandwidth_governor.unregister(job.id)
+            self.connection_budget.release(fragments)
+        
+        if ydl.needs_ffmpeg():
+            # Free the download slot for the next job while FFmpeg runs
+            job.timings.switch('processing_queue')
+            self.download_queue.defer(job)
+            self.postprocess_pool.submit(lambda: self.process_job(job, ydl, info))
+        else:
+            self.finish_job(job, ydl, info)
+    
+    def process_job(self, job, ydl, info):
+        """Post-process a deferred job (runs on a processing pool worker)"""
+        try:
+            self.finish_job(job, ydl, info)
+        except Exception as e:
+            self.download_queue.finish(job, e)
+        else:
+            self.download_queue.finish(job)
+    
+    def download_job(self, job, fragments):
+        """Run yt-dlp's download for a job with the given number of fragment connections
+        
+        Returns (ydl, info); post-processing is left to finish_job().
+        """
+        progress_hook = lambda d: self.progress_hook(job, d)
+        postprocessor_hook = lambda d: self.postprocessor_hook(job, d)
+        
+        # Per-job options; the rest comes with the pooled instance's profile
+        params = {
+            'outtmpl': f'{job.download_path}/%(title)s.%(ext)s',
+            'logger': RetryCountingLogger(job),
+            'concurrent_fragment_downloads': fragments,
+            'http_chunk_size': job.chunk_size or None,
+        }
+        if job.output_format == 'mp3':
+            profile = 'download-mp3'
+        else:
+            profile = 'download'
+            params.update({
+                'format': job.quality['format_id'],
+                'merge_output_format': job.output_format,
+                'retries': job.retries,
+            })
+        
+        ydl = self.sessions.acquire(profile)
+        try:
+            ydl.configure(params, [progress_hook], [postprocessor_hook])
+            ydl.add_post_processor(BeforeDownloadPP(lambda info: self.preflight(job, info), ydl), when='before_dl')
+            info = self.download_with_info(ydl, job)
+        except BaseException:
+            job.timings.stop()
+            self.sessions.release(ydl)
+            raise
+        return ydl, info
+    
+    def finish_job(self, job, ydl, info):
+        """Run a downloaded job's post-processing, then record it in the history and archive"""
+        try:
+            job.processing_steps = ydl.post_process_steps()
+            info = ydl.run_post_processing() or info
+            job.title = info.get('title', 'Unknown')
+            job.timings.switch('finalize')
+            
+            # yt-dlp's final paths, after title sanitizing, merging and conversion
+            files = [path for path in ydl.output_files if os.path.exists(path)]
+            self.folder_index.add(files)
+            
+            # Record download
+            download_seconds = job.timings.get('download')
+            download_record = {
+                'title': job.title,
+                'url': job.url,
+                'quality': job.quality['resolution'],
+                'format': job.output_format,
+                'path': job.download_path,
+                'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                'files': files,
+                'size': sum(os.path.getsize(path) for path in files),
+                'bytes': job.transferred_bytes,
+                'retries': job.retry_count,
+                'throughput': round(job.transferred_bytes / download_seconds) if download_seconds else 0,
+                'timings': job.timings.to_dict()
+            }
+            self.history.append(download_record)
+            
+            archive_id = info_archive_id(info)
+            keys = [job.archive_key]
+            if archive_id:
+                keys.append(archive_key(*archive_id, job.output_format))
+            self.archive.add_many(key for key in keys if key)
+        finally:
+            self.sessions.release(ydl)
+            job.timings.stop()
+    
+    def preflight(self, job, info):
+        """Reserve the disk space a job needs once its formats are known, before it downloads anything
+        
+        Waits while the space is promised to other running jobs; raises
+        InsufficientSpaceError if the job can't fit at all.
+        """
+        needed = estimate_output_size(info, job.output_format)
+        waiting = False
+        while not self.space_budget.reserve(job, job.download_path, needed):
+            if job.interrupt:
+                raise JobInterrupted(job.interrupt)
+            if not waiting:
+                waiting = True
+                job.timings.switch('space_wait')
+                self._log(f"#{job.id} waiting for disk space: needs {needed / (1024 * 1024):.0f} MB", "warning")
+            self.space_budget.wait(SPACE_WAIT)
+        if waiting:
+            job.timings.switch('download')
+    
+    def download_with_info(self, ydl, job):
+        """Download from the already extracted info, re-extracting only if its URLs expired"""
+        info, job.info = job.info, None
+        if info is not None and not stream_urls_expired(info):
+            try:
+                job.timings.switch('download')
+                return ydl.process_ie_result(ydl.sanitize_info(info, remove_private_keys=True), download=True)
+            except youtube_dl.utils.DownloadError as e:
+                self._log(f"Reusing video info failed, re-extracting: {str(e)[:60]}", "warning")
+        
+        # Same as extract_info(download=True), split so both phases are timed
+        job.timings.switch('extract')
+        info = ydl.extract_info(job.url, download=False, process=False)
+        job.timings.switch('download')
+        return ydl.process_ie_result(info, download=True)
+    
+    def progress_hook(self, job, d):
+        """Record download progress (runs on the download thread for every chunk)"""
+        if job.interrupt:
+            # yt-dlp unwinds and keeps the .part file, so a paused job resumes where it stopped
+            raise JobInterrupted(job.interrupt)
+        
+        if d['status'] == 'downloading':
+            tmpfilename = d.get('tmpfilename')
+            if tmpfilename:
+                job.partial_files.add(tmpfilename)
+                if tmpfilename not in job.preallocated and d.get('total_bytes'):
+                    # yt-dlp has the file open by now, so nothing truncates the allocation
+                    job.preallocated.add(tmpfilename)
+                    preallocate(tmpfilename, d['total_bytes'])
+            downloaded = d.get('downloaded_bytes') or 0
+            total = d.get('total_bytes') or d.get('total_bytes_estimate') or 0
+            if total:
+                job.progress = min(downloaded * 100 / total, 100.0)
+            job.downloaded_bytes = downloaded
+            self.job_journal.update_progress(job)
+            
+            # Enforce the shared bandwidth limit by pausing this download thread
+            self.bandwidth_governor.throttle(job.id, d.get('filename'), downloaded)
+            self.progress_aggregator.update(
+                job.id,
+                status='downloading',
+                downloaded=downloaded,
+                total=total,
+                speed=d.get('speed') or 0,
+                eta=d.get('eta') or 0
+            )
+        
+        elif d['status'] == 'finished':
+            job.transferred_bytes += d.get('total_bytes') or d.get('downloaded_bytes') or 0
+            if d.get('filename'):
+                # Formats waiting to be merged are partial output too
+                job.partial_files.add(d['filename'])
+                self.job_journal.update_progress(job)
+            self.progress_aggregator.update(job.id, status='finished')
+    
+    def postprocessor_hook(self, job, d):
+        """Time merging, FFmpeg postprocessing and moving files as separate phases, and count the steps done"""
+        postprocessor = d.get('postprocessor') or ''
+        if d['status'] == 'started':
+            job.timings.switch(postprocessor_phase(postprocessor))
+        elif d['status'] == 'finished':
+            job.timings.switch('finalize')
+            if job.processing_steps:
+                job.processing_progress = min(job.processing_progress + 100 / job.processing_steps, 100.0)
+        self.progress_aggregator.update(
+            job.id,
+            status='processing',
+            step=postprocessor,
+            progress=job.processing_progress
+        )
+    
+    def remove_partial_files(self, job):
+        """Delete what a cancelled job left behind: .part files, unmerged formats and fragments"""
+        for path in job.partial_files:
+            target = path[:-len('.part')] if path.endswith('.part') else path
+            for leftover in [path, target + '.ytdl'] + glob.glob(glob.escape(path) + '-Frag*'):
+                try:
+                    os.remove(leftover)
+                except OSError:
+                    pass
+        job.partial_files.clear()
+    
+    def _on_job_update(self, job):
+        # Called from queue worker threads on every state change
+        if job.state not in (DownloadJob.RUNNING, DownloadJob.PROCESSING):
+            self.space_budget.release(job)
+        if job.state == DownloadJob.RUNNING:
+            # The priority may have changed; its weight sets the job's bandwidth share
+            self.bandwidth_governor.set_weight(job.id, job.weight)
+        if job.state == DownloadJob.CANCELLED:
+            self.remove_partial_files(job)
+        if job.state in (DownloadJob.PAUSED, DownloadJob.QUEUED):
+            # Paused or preempted; drop it from the merged progress until it runs again
+            self.progress_aggregator.update(job.id, status='closed')
+        if job.finished:
+            self.job_journal.remove(job.id)
+            # Drop the job from the merged progress display
+            self.progress_aggregator.update(job.id, status='closed')
+            self.metrics.observe(job)
+            self.metrics.write(self.metrics_path, self.download_queue.counts())
+        else:
+            self.job_journal.record(job)
+        
+        if self.on_job_update:
+            self.on_job_update(job)
+    
+    def _log(self, message, message_type):
+        if self.on_log:
+            self.on_log(message, message_type)
@@ -0,0 +1,272 @@
+"""Format records, a per-video format index and scored quality policies"""
+import re
+
+# Video codec families, matched against yt-dlp vcodec strings
+CODEC_PATTERNS = {
+    'av01': r'^av01',
+    'vp9': r'^vp0?9',
+    'hevc': r'^(hev1|hvc1|h265)',
+    'avc1': r'^(avc1?|h264)',
+}
+
+CODEC_NAMES = {
+    'av01': "AV1",
+    'vp9': "VP9",
+    'hevc': "H.265",
+    'avc1': "H.264",
+}
+
+# Share of a size budget the compiled selector leaves for the video stream
+VIDEO_SIZE_SHARE = 0.9
+
+def codec_family(codec):
+    """Return the codec family key for a yt-dlp codec string, or the string itself"""
+    codec = (codec or 'none').lower()
+    for family, pattern in CODEC_PATTERNS.items():
+        if re.match(pattern, codec):
+            return family
+    return codec.split('.')[0]
+
+def category_for_height(height):
+    """Quality tab for a video of the given short side"""
+    if height >= 1440:
+        return '4k'
+    if height >= 1080:
+        return '1080p'
+    if height >= 720:
+        return '720p'
+    return 'sd'
+
+class FormatRecord:
+    """One format with its fields parsed to numbers once
+    
+    Slotted, since a video summary keeps one per format for as long as
+    the video is shown or queued; to_dict() is the compact form cached
+    on disk and accepted back by the constructor.
+    """
+    __slots__ = ('index', 'format_id', 'ext', 'resolution', 'format_note', 'vcodec', 'acodec',
+                 'has_video', 'has_audio', 'fps', 'tbr', 'abr', 'filesize', 'width', 'height', 'short_side')
+    
+    def __init__(self, fmt, index=None):
+        self.index = index  # Position in the list the record was built from
+        self.format_id = str(fmt.get('format_id') or '')
+        self.ext = fmt.get('ext') or ''
+        self.format_note = fmt.get('format_note') or ''
+        self.vcodec = codec_family(fmt.get('vcodec'))
+        self.acodec = codec_family(fmt.get('acodec'))
+        self.has_video = self.vcodec != 'none'
+        self.has_audio = self.acodec != 'none'
+        self.fps = float(fmt.get('fps') or 0)
+        self.tbr = float(fmt.get('tbr') or 0)
+        self.abr = float(fmt.get('abr') or 0) or (self.tbr if not self.has_video else 0)
+        self.filesize = int(fmt.get('filesize') or fmt.get('filesize_approx') or 0)
+        
+        width, height = fmt.get('width'), fmt.get('height')
+        if not (width and height):
+            parsed_width, parsed_height = self._parse_resolution(fmt.get('resolution') or '')
+            width, height = width or parsed_width, height or parsed_height
+        self.width = int(width or 0)
+        self.height = int(height or 0)
+        self.resolution = fmt.get('resolution') or (f"{self.width}x{self.height}" if self.width else 'Unknown')
+        # Portrait videos are labelled by their short side, like 1080x1920 -> 1080p
+        self.short_side = min(self.width, self.height) if self.width and self.height else self.height
+    
+    @staticmethod
+    def _parse_resolution(resolution):
+        match = re.match(r'^(\d+)x(\d+)$', resolution)
+        if match:
+            return int(match.group(1)), int(match.group(2))
+        match = re.match(r'^(\d+)p', resolution)
+        if match:
+            return None, int(match.group(1))
+        return None, None
+    
+    @property
+    def category(self):
+        if not self.has_video:
+            return 'audio' if self.has_audio else None
+        return category_for_height(self.short_side)
+    
+    @property
+    def label(self):
+        if not self.has_video:
+            return 'audio'
+        fps = f"{self.fps:.0f}" if self.fps > 30 else ''
+        return f"{self.short_side}p{fps}"
+    
+    def quality(self, format_id=None):
+        """The quality snapshot a download job keeps, optionally for a merged format spec"""
+        return {
+            'format_id': format_id or self.format_id,
+            'resolution': self.resolution,
+            'format_note': self.format_note,
+            'filesize': self.filesize
+        }
+    
+    def to_dict(self):
+        return {
+            'format_id': self.format_id,
+            'ext': self.ext,
+            'resolution': self.resolution,
+            'format_note': self.format_note,
+            'vcodec': self.vcodec,
+            'acodec': self.acodec,
+            'fps': self.fps,
+            'tbr': self.tbr,
+            'abr': self.abr,
+            'filesize': self.filesize,
+            'width': self.width,
+            'height': self.height
+        }
+
+class FormatIndex:
+    """The formats of one video, indexed by height, fps, codec and container
+    
+    Takes yt-dlp format dicts or the FormatRecords of a VideoSummary,
+    which are used as they are.
+    """
+    def __init__(self, formats):
+        self.records = [fmt if isinstance(fmt, FormatRecord) else FormatRecord(fmt, index)
+                        for index, fmt in enumerate(formats)]
+        self.video = [r for r in self.records if r.has_video]
+        self.audio = [r for r in self.records if r.has_audio and not r.has_video]
+        self.by_height = {}
+        self.by_fps = {}
+        self.by_codec = {}
+        self.by_container = {}
+        for record in self.video:
+            self.by_height.setdefault(record.short_side, []).append(record)
+            self.by_fps.setdefault(record.fps, []).append(record)
+            self.by_codec.setdefault(record.vcodec, []).append(record)
+        for record in self.records:
+            self.by_container.setdefault(record.ext, []).append(record)
+        self.heights = sorted(self.by_height, reverse=True)
+    
+    def lookup(self, max_height=None, fps=None, codec=None, container=None):
+        """Video records matching every given criterion"""
+        heights = [h for h in self.heights if max_height is None or h <= max_height]
+        found = [r for h in heights for r in self.by_height[h]]
+        for key, table in ((fps, self.by_fps), (codec, self.by_codec), (container, self.by_container)):
+            if key is not None:
+                allowed = {id(r) for r in table.get(key, [])}
+                found = [r for r in found if id(r) in allowed]
+        return found
+    
+    def categories(self):
+        """Record indexes per quality tab, in the original order"""
+        categories = {'4k': [], '1080p': [], '720p': [], 'sd': [], 'audio': []}
+        for record in self.records:
+            if record.category:
+                categories[record.category].append(record.index)
+        return categories
+
+class FormatPolicy:
+    """A scored quality choice
+    
+    select() picks concrete formats from a FormatIndex; selector()
+    compiles the same policy to a yt-dlp format selector for when the
+    formats aren't known yet.
+    """
+    def __init__(self, max_height=None, max_filesize=None, codecs=(), audio_only=False):
+        self.max_height = max_height
+        self.max_filesize = max_filesize  # bytes for video and audio together
+        self.codecs = tuple(codecs)       # preferred video codec families, best first
+        self.audio_only = audio_only
+    
+    @classmethod
+    def from_settings(cls, settings, max_height=None, output_format='mp4'):
+        """The default policy from the saved settings"""
+        codec = settings.get('preferred_codec', 'any')
+        max_size_mb = int(settings.get('max_size_mb', '0'))
+        return cls(
+            max_height=max_height,
+            max_filesize=max_size_mb * 1024 * 1024 or None,
+            codecs=() if codec == 'any' else (codec,),
+            audio_only=output_format == 'mp3'
+        )
+    
+    @property
+    def label(self):
+        if self.audio_only:
+            return 'audio'
+        parts = [f'≤{self.max_height}p' if self.max_height else 'best']
+        if self.codecs:
+            parts.append(CODEC_NAMES.get(self.codecs[0], self.codecs[0]))
+        if self.max_filesize:
+            parts.append(f'≤{self.max_filesize // (1024 * 1024)}MB')
+        return ' '.join(parts)
+    
+    def audio_score(self, record):
+        return (record.abr, record.tbr, record.filesize)
+    
+    def video_score(self, record):
+        codec_rank = len(self.codecs) - self.codecs.index(record.vcodec) if record.vcodec in self.codecs else 0
+        return (record.short_side, record.fps, codec_rank, record.has_audio, record.tbr)
+    
+    def select(self, index):
+        """Return the (video, audio) records this policy picks; either may be None"""
+        audio = max(index.audio, key=self.audio_score, default=None)
+        if self.audio_only:
+            if audio is None:
+                # No audio-only stream; fall back to the smallest muxed format
+                muxed = [r for r in index.video if r.has_audio]
+                return min(muxed, key=lambda r: (r.short_side, r.tbr), default=None), None
+            return None, audio
+        
+        candidates = index.lookup(max_height=self.max_height) or index.video
+        if not candidates:
+            return None, audio
+        
+        def total_size(record):
+            if record.has_audio or audio is None:
+                return record.filesize
+            return record.filesize + audio.filesize if record.filesize and audio.filesize else 0
+        
+        if self.max_filesize:
+            # Unknown sizes are allowed; if nothing fits, take the smallest known
+            fitting = [r for r in candidates if total_size(r) <= self.max_filesize]
+            candidates = fitting or [min(candidates, key=lambda r: total_size(r) or float('inf'))]
+        
+        video = max(candidates, key=self.video_score)
+        return video, None if video.has_audio else audio
+    
+    def resolve(self, index):
+        """Return (format spec, label) for a known video; the compiled selector is the fallback"""
+        video, audio = self.select(index)
+        picked = [r for r in (video, audio) if r is not None]
+        if not picked:
+            return self.selector(), self.label
+        
+        spec = '+'.join(r.format_id for r in picked)
+        return f'{spec}/{self.selector()}', (video or audio).label
+    
+    def selector(self):
+        """Compile the policy to a yt-dlp format selector"""
+        if self.audio_only:
+            return 'bestaudio/best'
+        
+        if self.max_height:
+            # Heights are short sides, as in FormatIndex: the height of a landscape
+            # format, the width of a portrait one; formats of unknown shape use height
+            sides = [
+                f'[aspect_ratio>=1][height<={self.max_height}]',
+                f'[aspect_ratio<1][width<={self.max_height}]',
+                f'[height<={self.max_height}]',
+            ]
+        else:
+            sides = ['']
+        if self.max_filesize:
+            video_size = f'[filesize<?{int(self.max_filesize * VIDEO_SIZE_SHARE)}]'
+            total_size = f'[filesize<?{self.max_filesize}]'
+        else:
+            video_size = total_size = ''
+        
+        # (format, filters after the height filter) per alternative, best first
+        choices = [
+            ('bestvideo', f"[vcodec~='{CODEC_PATTERNS.get(codec, '^' + codec)}']{video_size}+bestaudio")
+            for codec in self.codecs
+        ]
+        if video_size:
+            choices += [('bestvideo', f'{video_size}+bestaudio'), ('best', total_size)]
+        choices += [('bestvideo', '+bestaudio'), ('best', '')]
+        return '/'.join(f'{base}{side}{rest}' for base, rest in choices for side in sides)
@@ -0,0 +1,117 @@
+"""Append-only download history"""
+import os
+import json
+import threading
+
+HISTORY_FILE = 'videmon_history.jsonl'
+HISTORY_TOTALS_FILE = 'videmon_history_totals.json'
+LEGACY_HISTORY_FILE = 'videmon_history.json'
+
+class HistoryStore:
+    """Append-only download history (JSON Lines) with running totals
+    
+    The totals file records how many bytes of the history file it covers,
+    so startup only reads records appended after the last totals write.
+    """
+    def __init__(self, path=HISTORY_FILE, totals_path=HISTORY_TOTALS_FILE, legacy_path=LEGACY_HISTORY_FILE):
+        self.path = path
+        self.totals_path = totals_path
+        self.legacy_path = legacy_path
+        self.count = 0
+        self.total_bytes = 0
+        self._offset = 0
+        self._lock = threading.Lock()
+        
+        self._migrate_legacy()
+        self._load_totals()
+        self._catch_up()
+    
+    def append(self, record):
+        """Durably append one download record and update the totals"""
+        line = (json.dumps(record) + '\n').encode('utf-8')
+        with self._lock:
+            with open(self.path, 'ab') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+                self._offset = f.tell()
+            self._add(record)
+            self._save_totals()
+    
+    def records(self):
+        """Iterate over all history records, oldest first"""
+        try:
+            with open(self.path, 'rb') as f:
+                for line in f:
+                    if line.endswith(b'\n'):
+                        yield json.loads(line)
+        except OSError:
+            return
+    
+    def _add(self, record):
+        self.count += 1
+        self.total_bytes += record.get('size') or 0
+    
+    def _load_totals(self):
+        try:
+            with open(self.totals_path, 'r') as f:
+                totals = json.load(f)
+            self.count = totals['count']
+            self.total_bytes = totals['bytes']
+            self._offset = totals['offset']
+        except (OSError, ValueError, KeyError):
+            self.count = self.total_bytes = self._offset = 0
+    
+    def _save_totals(self):
+        totals = {'count': self.count, 'bytes': self.total_bytes, 'offset': self._offset}
+        try:
+            with open(self.totals_path + '.tmp', 'w') as f:
+                json.dump(totals, f)
+            os.replace(self.totals_path + '.tmp', self.totals_path)
+        except OSError:
+            pass
+    
+    def _catch_up(self):
+        """Fold in records the totals file doesn't cover yet"""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            size = 0
+        
+        if size < self._offset:
+            # History was replaced or truncated; recount from the start
+            self.count = self.total_bytes = self._offset = 0
+        if size == self._offset:
+            return
+        
+        try:
+            with open(self.path, 'rb+') as f:
+                f.seek(self._offset)
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        # Drop a record torn by a crash mid-append
+                        f.truncate(self._offset)
+                        break
+                    try:
+                        self._add(json.loads(line))
+                    except ValueError:
+                        pass
+                    self._offset += len(line)
+        except OSError:
+            return
+        self._save_totals()
+    
+    def _migrate_legacy(self):
+        """Convert the old single-JSON history file to JSON Lines once"""
+        if os.path.exists(self.path) or not os.path.exists(self.legacy_path):
+            return
+        try:
+            with open(self.legacy_path, 'r') as f:
+                legacy = json.load(f)
+            with open(self.path + '.tmp', 'w') as f:
+                for record in legacy:
+                    f.write(json.dumps(record) + '\n')
+            os.replace(self.path + '.tmp', self.path)
+            os.replace(self.legacy_path, self.legacy_path + '.migrated')
+        except (OSError, ValueError):
+            pass
@@ -0,0 +1,436 @@
+"""Download jobs, the worker queue that runs them and the job journal"""
+import os
+import json
+import time
+import heapq
+import itertools
+import threading
+from collections import namedtuple
+
+from .metrics import PhaseTimer
+
+# Journal of unfinished jobs, resumed on the next start
+JOB_JOURNAL_FILE = 'videmon_jobs.json'
+JOB_JOURNAL_FLUSH_INTERVAL = 5  # seconds between progress-only journal writes
+
+# Bandwidth share of an urgent job when a limit is set; other jobs weigh 1
+URGENT_WEIGHT = 4
+
+class JobSpec(namedtuple('JobSpec', 'url format_id resolution output_format download_path retries fragments chunk_size')):
+    """What a job downloads and how, fixed when it is queued
+    
+    Immutable, so nothing the app or a later settings change does can
+    alter a job that is already queued or running.
+    """
+    __slots__ = ()
+
+class DownloadJob:
+    """A download request with a snapshot of the options it was queued with"""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    PROCESSING = 'processing'  # Downloaded; waiting for or running FFmpeg post-processing
+    PAUSED = 'paused'
+    DONE = 'done'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+    
+    # Requests to stop a running job, honoured at its next progress update
+    PAUSE = 'pause'
+    PREEMPT = 'preempt'  # Pause and re-queue for a higher priority job
+    CANCEL = 'cancel'
+    
+    # Priorities; higher runs first and may preempt lower running jobs
+    NORMAL = 0
+    URGENT = 10
+    
+    _ids = itertools.count(1)
+    
+    def __init__(self, url, quality, output_format, download_path, retries, info=None,
+                 fragments=1, chunk_size=0):
+        self.id = next(DownloadJob._ids)
+        # fragments: parallel fragment downloads wanted; chunk_size: HTTP chunk size in bytes, 0 for yt-dlp's default
+        self.spec = JobSpec(url, quality['format_id'], quality.get('resolution', 'Unknown'), output_format,
+                            download_path, retries, fragments, chunk_size)
+        self.info = info  # Info dict from GET VIDEO INFO, reused when still fresh
+        self.title = url
+        self.state = DownloadJob.QUEUED
+        self.progress = 0.0
+        self.processing_progress = 0.0  # Percentage of the post-processing steps done
+        self.processing_steps = 0
+        self.downloaded_bytes = 0
+        self.error = None
+        self.queued_at = time.monotonic()
+        self.timings = PhaseTimer()  # Seconds spent in each phase (extract, queue, download, ...)
+        self.retry_count = 0
+        self.transferred_bytes = 0  # Bytes of every file downloaded for this job
+        self.on_state_change = None  # Optional per-job listener, called like on_update
+        self.batch = None  # Playlist or URL batch the job belongs to, if any
+        self.archive_key = None  # Download archive key; one unfinished job per key
+        self.priority = DownloadJob.NORMAL
+        self.interrupt = None  # PAUSE, PREEMPT or CANCEL while a stop is requested
+        self.partial_files = set()  # .part files written so far, removed on cancel
+        self.preallocated = set()   # .part files whose disk blocks were allocated up front
+    
+    @property
+    def finished(self):
+        return self.state in (DownloadJob.DONE, DownloadJob.FAILED, DownloadJob.CANCELLED)
+    
+    @property
+    def weight(self):
+        """Share of the bandwidth limit relative to other jobs, from the priority"""
+        return URGENT_WEIGHT if self.priority >= DownloadJob.URGENT else 1
+    
+    @property
+    def url(self):
+        return self.spec.url
+    
+    @property
+    def output_format(self):
+        return self.spec.output_format
+    
+    @property
+    def download_path(self):
+        return self.spec.download_path
+    
+    @property
+    def retries(self):
+        return self.spec.retries
+    
+    @property
+    def fragments(self):
+        return self.spec.fragments
+    
+    @property
+    def chunk_size(self):
+        return self.spec.chunk_size
+    
+    @property
+    def quality(self):
+        return {'format_id': self.spec.format_id, 'resolution': self.spec.resolution}
+    
+    def to_record(self):
+        """Serializable job parameters for the job journal"""
+        return {
+            'url': self.url,
+            'quality': self.quality,
+            'format': self.output_format,
+            'path': self.download_path,
+            'retries': self.retries,
+            'fragments': self.fragments,
+            'chunk_size': self.chunk_size,
+            'title': self.title,
+            'downloaded_bytes': self.downloaded_bytes,
+            'archive_key': self.archive_key,
+            'priority': self.priority,
+            'paused': self.state == DownloadJob.PAUSED,
+            'partial_files': sorted(self.partial_files)
+        }
+    
+    @classmethod
+    def from_record(cls, record):
+        job = cls(
+            record['url'],
+            record['quality'],
+            record['format'],
+            record['path'],
+            record['retries'],
+            fragments=record.get('fragments', 1),
+            chunk_size=record.get('chunk_size', 0)
+        )
+        job.title = record.get('title', job.url)
+        job.downloaded_bytes = record.get('downloaded_bytes', 0)
+        job.archive_key = record.get('archive_key')
+        job.priority = record.get('priority', DownloadJob.NORMAL)
+        job.partial_files = set(record.get('partial_files', []))
+        return job
+
+class JobJournal:
+    """Durable record of queued and running jobs that survives the app being killed
+    
+    State changes and new partial files are written immediately; byte
+    counts at most every flush_interval seconds. Writes go to a temp file that is fsync'd and
+    renamed over the journal, so a crash never leaves it half written.
+    """
+    def __init__(self, path=JOB_JOURNAL_FILE, flush_interval=JOB_JOURNAL_FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._records = {}
+        self._last_flush = 0
+        self._lock = threading.Lock()
+    
+    def take_pending(self):
+        """Return the jobs left unfinished by the previous run and reset the journal"""
+        try:
+            with open(self.path, 'r') as f:
+                pending = list(json.load(f).values())
+        except (OSError, ValueError):
+            pending = []
+        
+        with self._lock:
+            self._records = {}
+            self._flush()
+        return pending
+    
+    def record(self, job):
+        with self._lock:
+            self._records[job.id] = job.to_record()
+            self._flush()
+    
+    def update_progress(self, job):
+        with self._lock:
+            record = self._records.get(job.id)
+            if record is None:
+                return
+            # A new partial file is written at once, so a crash can't orphan it
+            partial_files = sorted(job.partial_files)
+            files_changed = partial_files != record.get('partial_files')
+            record['downloaded_bytes'] = job.downloaded_bytes
+            record['title'] = job.title
+            record['partial_files'] = partial_files
+            if files_changed or time.time() - self._last_flush >= self.flush_interval:
+                self._flush()
+    
+    def remove(self, job_id):
+        with self._lock:
+            if self._records.pop(job_id, None) is not None:
+                self._flush()
+    
+    def _flush(self):
+        # Caller must hold the lock
+        self._last_flush = time.time()
+        try:
+            with open(self.path + '.tmp', 'w') as f:
+                json.dump({str(job_id): record for job_id, record in self._records.items()}, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(self.path + '.tmp', self.path)
+        except OSError:
+            pass
+
+class DownloadQueue:
+    """Bounded worker pool that runs queued download jobs in parallel
+    
+    Queued jobs start in priority order, then in submission order. A job
+    submitted while every slot is busy preempts the lowest priority
+    running job if its own priority is higher; that job is re-queued and
+    resumes from its partial file once a slot frees up. Running jobs are
+    paused or cancelled by setting job.interrupt, which the runner is
+    expected to honour by raising out of the download.
+    """
+    def __init__(self, runner, max_workers=1, on_update=None):
+        self.runner = runner
+        self.on_update = on_update
+        self.max_workers = max(1, int(max_workers))
+        self._jobs = []
+        self._pending = []  # Heap of (-priority, sequence, job)
+        self._sequence = itertools.count()
+        self._running = set()
+        self._active = {}  # archive key -> unfinished job
+        self._workers = 0
+        self._lock = threading.Lock()
+    
+    def submit(self, job, paused=False):
+        """Queue a job; it starts as soon as a worker slot is free
+        
+        Returns the job, or the unfinished job already queued with the same
+        archive key, in which case nothing is queued. A paused job waits
+        for resume().
+        """
+        with self._lock:
+            duplicate = self._active.get(job.archive_key)
+            if duplicate is not None:
+                return duplicate
+            if job.archive_key:
+                self._active[job.archive_key] = job
+        
+        if paused:
+            job.state = DownloadJob.PAUSED
+        # Report the state before a worker can pick the job up
+        self._notify(job)
+        with self._lock:
+            self._jobs.append(job)
+            if not paused:
+                self._enqueue(job)
+        return job
+    
+    def set_max_workers(self, max_workers):
+        """Resize the pool; extra workers retire after their current job"""
+        with self._lock:
+            self.max_workers = max(1, int(max_workers))
+            self._spawn_workers()
+    
+    def find(self, archive_key):
+        """Return the unfinished job with this archive key, or None"""
+        with self._lock:
+            return self._active.get(archive_key)
+    
+    def pause(self, job):
+        """Pause a queued or running job; a running job keeps its partial file"""
+        with self._lock:
+            if job.state == DownloadJob.QUEUED:
+                self._remove_pending(job)
+            elif job.state == DownloadJob.RUNNING:
+                job.interrupt = DownloadJob.PAUSE
+                return
+            else:
+                return
+            job.state = DownloadJob.PAUSED
+        self._notify(job)
+    
+    def resume(self, job):
+        """Queue a paused job again"""
+        with self._lock:
+            if job.state != DownloadJob.PAUSED:
+                return
+            job.state = DownloadJob.QUEUED
+            job.queued_at = time.monotonic()
+        self._notify(job)
+        with self._lock:
+            self._enqueue(job)
+    
+    def cancel(self, job):
+        """Cancel a job that hasn't finished downloading"""
+        with self._lock:
+            if job.state == DownloadJob.RUNNING:
+                job.interrupt = DownloadJob.CANCEL
+                return
+            if job.state == DownloadJob.QUEUED:
+                self._remove_pending(job)
+            elif job.state != DownloadJob.PAUSED:
+                return
+        self._settle(job, DownloadJob.CANCELLED)
+    
+    def set_priority(self, job, priority):
+        """Change a job's priority; a queued job may preempt a running one"""
+        with self._lock:
+            job.priority = priority
+            if job.state == DownloadJob.QUEUED:
+                self._remove_pending(job)
+                self._enqueue(job)
+        self._notify(job)
+    
+    def defer(self, job):
+        """Mark a downloaded job as processing; its worker slot frees up and finish() completes it"""
+        # Post-processing can't be interrupted; drop any stop requested too late
+        job.interrupt = None
+        job.state = DownloadJob.PROCESSING
+        self._notify(job)
+    
+    def finish(self, job, error=None):
+        """Complete a job as done, or failed with the given exception"""
+        if error is not None:
+            job.error = str(error)
+        self._settle(job, DownloadJob.DONE if error is None else DownloadJob.FAILED)
+    
+    def snapshot(self):
+        with self._lock:
+            return list(self._jobs)
+    
+    def counts(self):
+        counts = {
+            DownloadJob.QUEUED: 0,
+            DownloadJob.RUNNING: 0,
+            DownloadJob.PAUSED: 0,
+            DownloadJob.PROCESSING: 0,
+            DownloadJob.DONE: 0,
+            DownloadJob.FAILED: 0,
+            DownloadJob.CANCELLED: 0
+        }
+        for job in self.snapshot():
+            counts[job.state] += 1
+        return counts
+    
+    def summary(self):
+        counts = self.counts()
+        summary = (f"{counts[DownloadJob.RUNNING]} running | {counts[DownloadJob.QUEUED]} queued | "
+                   f"{counts[DownloadJob.PROCESSING]} processing | {counts[DownloadJob.DONE]} done | "
+                   f"{counts[DownloadJob.FAILED]} failed")
+        if counts[DownloadJob.PAUSED]:
+            summary += f" | {counts[DownloadJob.PAUSED]} paused"
+        if counts[DownloadJob.CANCELLED]:
+            summary += f" | {counts[DownloadJob.CANCELLED]} cancelled"
+        return summary
+    
+    def clear_finished(self):
+        with self._lock:
+            self._jobs = [job for job in self._jobs if not job.finished]
+    
+    def _settle(self, job, state):
+        job.state = state
+        with self._lock:
+            if self._active.get(job.archive_key) is job:
+                del self._active[job.archive_key]
+        self._notify(job)
+    
+    def _enqueue(self, job):
+        # Caller must hold the lock
+        heapq.heappush(self._pending, (-job.priority, next(self._sequence), job))
+        self._preempt_for(job)
+        self._spawn_workers()
+    
+    def _remove_pending(self, job):
+        # Caller must hold the lock
+        self._pending = [entry for entry in self._pending if entry[2] is not job]
+        heapq.heapify(self._pending)
+    
+    def _preempt_for(self, job):
+        # Caller must hold the lock; only when no slot is free for the job
+        if len(self._running) < self.max_workers:
+            return
+        candidates = [running for running in self._running if running.interrupt is None]
+        if not candidates:
+            return
+        victim = min(candidates, key=lambda running: running.priority)
+        if victim.priority < job.priority:
+            victim.interrupt = DownloadJob.PREEMPT
+    
+    def _spawn_workers(self):
+        # Caller must hold the lock
+        while self._pending and self._workers < self.max_workers:
+            self._workers += 1
+            threading.Thread(target=self._worker, daemon=True).start()
+    
+    def _worker(self):
+        while True:
+            with self._lock:
+                if not self._pending or self._workers > self.max_workers:
+                    self._workers -= 1
+                    return
+                job = heapq.heappop(self._pending)[2]
+                job.state = DownloadJob.RUNNING
+                self._running.add(job)
+            self._notify(job)
+            
+            try:
+                self.runner(job)
+            except Exception as e:
+                error = e
+            else:
+                error = None
+            
+            with self._lock:
+                self._running.discard(job)
+                interrupt, job.interrupt = job.interrupt, None
+            
+            if error is not None and interrupt == DownloadJob.CANCEL:
+                self._settle(job, DownloadJob.CANCELLED)
+            elif error is not None and interrupt == DownloadJob.PAUSE:
+                job.state = DownloadJob.PAUSED
+                self._notify(job)
+            elif error is not None and interrupt == DownloadJob.PREEMPT:
+                job.state = DownloadJob.QUEUED
+                job.queued_at = time.monotonic()
+                self._notify(job)
+                with self._lock:
+                    heapq.heappush(self._pending, (-job.priority, next(self._sequence), job))
+            elif error is not None:
+                self.finish(job, error)
+            # A runner that deferred the job leaves finishing it to its processing stage
+            elif job.state == DownloadJob.RUNNING:
+                self.finish(job)
+    
+    def _notify(self, job):
+        if self.on_update:
+            self.on_update(job)
+        if job.on_state_change:
+            job.on_state_change(job)
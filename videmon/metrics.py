@@ -0,0 +1,157 @@
+"""Per-job phase timings and Prometheus text metrics"""
+import os
+import re
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_FILE = 'videmon_metrics.prom'
+
+PHASES = ('extract', 'queue', 'space_wait', 'download', 'processing_queue', 'merge', 'postprocess', 'finalize')
+
+# yt-dlp reports every retry as "... Retrying [fragment N] (count/retries)..."
+RETRY_RE = re.compile(r'Retrying\b[^(]*\(\d+/\d+\)')
+
+def postprocessor_phase(pp_key):
+    """Map a yt-dlp postprocessor key to the job phase it belongs to"""
+    if pp_key in ('Merger', 'VideoRemuxer') or pp_key.startswith('Fixup'):
+        return 'merge'
+    if pp_key.startswith('MoveFiles'):
+        return 'finalize'
+    return 'postprocess'
+
+class PhaseTimer:
+    """Wall-clock seconds a job spends in each phase
+    
+    At most one phase runs at a time; switching to a phase closes the
+    previous one.
+    """
+    def __init__(self):
+        self.phases = {}
+        self._phase = None
+        self._since = 0.0
+    
+    def switch(self, phase):
+        now = time.monotonic()
+        if self._phase:
+            self.add(self._phase, now - self._since)
+        self._phase, self._since = phase, now
+    
+    def stop(self):
+        self.switch(None)
+    
+    def add(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+    
+    def get(self, phase):
+        return self.phases.get(phase, 0.0)
+    
+    def to_dict(self):
+        return {phase: round(self.phases[phase], 3) for phase in PHASES if phase in self.phases}
+
+class RetryCountingLogger:
+    """yt-dlp logger that counts the retries of one job and drops other output"""
+    def __init__(self, job):
+        self.job = job
+    
+    def debug(self, message):
+        if RETRY_RE.search(message):
+            self.job.retry_count += 1
+    
+    info = warning = debug
+    
+    def error(self, message):
+        pass
+
+class MetricsRegistry:
+    """Aggregates over finished jobs, rendered in Prometheus text format"""
+    def __init__(self, version):
+        self.version = version
+        self.finished = {'done': 0, 'failed': 0}
+        self.bytes_total = 0
+        self.retries_total = 0
+        self.phase_seconds = dict.fromkeys(PHASES, 0.0)
+        self.phase_count = dict.fromkeys(PHASES, 0)
+        self._lock = threading.Lock()
+    
+    def observe(self, job):
+        """Add a finished job to the aggregates"""
+        with self._lock:
+            self.finished[job.state] = self.finished.get(job.state, 0) + 1
+            self.bytes_total += job.transferred_bytes
+            self.retries_total += job.retry_count
+            for phase, seconds in job.timings.phases.items():
+                self.phase_seconds[phase] += seconds
+                self.phase_count[phase] += 1
+    
+    def render(self, queue_counts=None):
+        """Return the metrics in Prometheus text exposition format"""
+        with self._lock:
+            lines = [
+                '# HELP videmon_build_info VideMon version.',
+                '# TYPE videmon_build_info gauge',
+                f'videmon_build_info{{version="{self.version}"}} 1',
+                '# HELP videmon_jobs_finished_total Finished download jobs by outcome.',
+                '# TYPE videmon_jobs_finished_total counter'
+            ]
+            lines += [f'videmon_jobs_finished_total{{state="{state}"}} {count}'
+                      for state, count in self.finished.items()]
+            lines += [
+                '# HELP videmon_downloaded_bytes_total Bytes downloaded by finished jobs.',
+                '# TYPE videmon_downloaded_bytes_total counter',
+                f'videmon_downloaded_bytes_total {self.bytes_total}',
+                '# HELP videmon_retries_total Download and extraction retries.',
+                '# TYPE videmon_retries_total counter',
+                f'videmon_retries_total {self.retries_total}',
+                '# HELP videmon_job_phase_seconds Time finished jobs spent in each phase.',
+                '# TYPE videmon_job_phase_seconds summary'
+            ]
+            for phase in PHASES:
+                lines.append(f'videmon_job_phase_seconds_sum{{phase="{phase}"}} {self.phase_seconds[phase]:.6f}')
+                lines.append(f'videmon_job_phase_seconds_count{{phase="{phase}"}} {self.phase_count[phase]}')
+        
+        if queue_counts is not None:
+            lines += [
+                '# HELP videmon_jobs Jobs in the download queue by state.',
+                '# TYPE videmon_jobs gauge'
+            ]
+            lines += [f'videmon_jobs{{state="{state}"}} {count}' for state, count in queue_counts.items()]
+        return '\n'.join(lines) + '\n'
+    
+    def write(self, path, queue_counts=None):
+        """Write the metrics file atomically (node_exporter textfile format)"""
+        try:
+            with open(path + '.tmp', 'w') as f:
+                f.write(self.render(queue_counts))
+            os.replace(path + '.tmp', path)
+        except OSError:
+            pass
+
+class MetricsServer:
+    """Serves GET /metrics on localhost from a render function"""
+    def __init__(self, render, port):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+    
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+    
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,105 @@
+"""asyncio front end to the engine for clients that run an event loop"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+# Interactive metadata fetches running at once; batches have their own pools
+INFO_WORKERS = 2
+
+class Orchestrator:
+    """Drives a DownloadEngine from an asyncio event loop
+    
+    Blocking work runs on executors with fixed sizes: downloads on the
+    engine's download queue, FFmpeg on its post-processing pool, and
+    metadata fetches on info_workers threads here. Engine callbacks
+    arrive on those worker threads and are handed to the loop, so job
+    updates and fetch results are only seen on the loop's thread, where
+    the client keeps its state. A job that changed state again before
+    the loop got to an update is reported once, in its newest state.
+    """
+    def __init__(self, engine, loop, on_job_update=None, info_workers=INFO_WORKERS):
+        self.engine = engine
+        self.loop = loop
+        self.on_job_update = on_job_update
+        self.info_executor = ThreadPoolExecutor(max_workers=info_workers, thread_name_prefix='videmon-info')
+        self._prefetch = None  # Task of the running background fetch
+        self._tasks = set()  # Tasks from start(); the loop itself only keeps weak references
+        self._waiters = {}  # job -> futures resolved when it finishes
+        post_update = self.threadsafe(self._job_update)
+        engine.on_job_update = lambda job: post_update(job, job.state)
+    
+    def threadsafe(self, callback):
+        """Wrap a callback so calls from any thread run it on the loop"""
+        def call(*args):
+            try:
+                self.loop.call_soon_threadsafe(callback, *args)
+            except RuntimeError:
+                pass  # Loop closed while shutting down
+        return call
+    
+    def start(self, coro):
+        """Run a coroutine as a task on the loop, keeping it alive until it finishes"""
+        task = self.loop.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+    
+    async def fetch_info(self, url):
+        """Return (summary, cached) for a video URL, extracted on the info executor"""
+        return await self.loop.run_in_executor(self.info_executor, self.engine.fetch_info, url)
+    
+    def prefetch(self, url, on_done):
+        """Fetch a URL's info in the background, superseding the previous prefetch
+        
+        on_done(url, summary, error) runs on the loop unless the prefetch
+        was superseded or cancelled first.
+        """
+        self.cancel_prefetch()
+        self._prefetch = self.loop.create_task(self._run_prefetch(url, on_done))
+        return self._prefetch
+    
+    def cancel_prefetch(self):
+        # yt-dlp keeps extracting on its thread; only the result is dropped
+        if self._prefetch is not None:
+            self._prefetch.cancel()
+            self._prefetch = None
+    
+    async def _run_prefetch(self, url, on_done):
+        try:
+            summary, _ = await self.fetch_info(url)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            on_done(url, None, str(e))
+        else:
+            on_done(url, summary, None)
+    
+    async def wait(self, job):
+        """Wait until a job is done, failed or cancelled"""
+        if not job.finished:
+            future = self.loop.create_future()
+            self._waiters.setdefault(job, []).append(future)
+            await future
+        return job
+    
+    async def wait_idle(self, interval=0.5):
+        """Wait until nothing is queued, running, processing or still being read"""
+        while self.engine.busy():
+            await asyncio.sleep(interval)
+    
+    def shutdown(self):
+        self.cancel_prefetch()
+        for task in list(self._tasks):
+            task.cancel()
+        self.info_executor.shutdown(wait=False, cancel_futures=True)
+        self.engine.sessions.close()
+    
+    def _job_update(self, job, state):
+        # On the loop; an update the job has already moved past is superseded by one still queued
+        if job.state != state:
+            return
+        if job.finished:
+            for future in self._waiters.pop(job, []):
+                if not future.done():
+                    future.set_result(job)
+        if self.on_job_update:
+            self.on_job_update(job)
@@ -0,0 +1,118 @@
+"""Streaming playlist downloads"""
+import time
+import threading
+
+from .archive import info_archive_id
+from .jobs import DownloadJob
+from .utils import trim_info
+
+# Playlist entries extracted ahead of the download queue
+PLAYLIST_PREFETCH = 2
+
+class PlaylistPipeline:
+    """Streams a playlist into the download queue entry by entry
+    
+    Entries are enumerated flat as the extractor pages them in. Full
+    metadata is extracted for at most `prefetch` entries that haven't
+    started downloading yet, so entry k+1 is extracted while entry k
+    downloads and memory stays bounded on very long playlists. Entries
+    for which skip((extractor, video_id)) is true are passed over before
+    any extraction. The extraction uses a 'playlist' session from the
+    SessionPool, kept for the whole playlist.
+    """
+    def __init__(self, url, make_job, download_queue, sessions, prefetch=PLAYLIST_PREFETCH, on_log=None,
+                 skip=None):
+        self.url = url
+        self.make_job = make_job
+        self.download_queue = download_queue
+        self.sessions = sessions
+        self.on_log = on_log
+        self.skip = skip
+        self.title = url
+        self.queued = 0
+        self.skipped = 0  # Already downloaded or already in the queue
+        self.failed = 0
+        self.finished = False  # Set once every entry has been queued or skipped
+        self._slots = threading.Semaphore(prefetch)
+    
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+    
+    def _run(self):
+        try:
+            with self.sessions.session('playlist') as ydl:
+                playlist = self._resolve(ydl, ydl.extract_info(self.url, download=False, process=False))
+                if playlist.get('_type') in ('playlist', 'multi_video'):
+                    entries = playlist.get('entries') or []
+                    self.title = playlist.get('title') or self.url
+                else:
+                    entries = [{'url': self.url}]
+                
+                self._log(f"Playlist: {self.title[:40]} - streaming entries", "info")
+                
+                for index, entry in enumerate(entries, 1):
+                    # Wait until an earlier entry starts downloading
+                    self._slots.acquire()
+                    if not self._feed(ydl, index, entry):
+                        self._slots.release()
+        
+        except Exception as e:
+            self._log(f"Playlist error: {str(e)[:80]}", "error")
+        else:
+            self._log(f"Playlist {self.title[:40]}: {self.queued} queued, {self.skipped} skipped, "
+                      f"{self.failed} failed", "success")
+        self.finished = True
+    
+    def _resolve(self, ydl, result):
+        # Follow redirects such as watch?v=...&list=... to the playlist page
+        while result.get('_type') in ('url', 'url_transparent'):
+            result = ydl.extract_info(
+                result['url'],
+                download=False,
+                ie_key=result.get('ie_key'),
+                process=False
+            )
+        return result
+    
+    def _feed(self, ydl, index, entry):
+        """Extract one entry and queue it; returns False if it was skipped"""
+        entry_url = entry.get('url') or entry.get('webpage_url')
+        if not entry_url:
+            return False
+        
+        archive_id = info_archive_id(entry)
+        if archive_id and self.skip and self.skip(archive_id):
+            self.skipped += 1
+            return False
+        
+        started = time.monotonic()
+        try:
+            info = ydl.extract_info(entry_url, download=False, ie_key=entry.get('ie_key'))
+        except Exception as e:
+            self.failed += 1
+            self._log(f"Playlist entry {index} skipped: {str(e)[:60]}", "warning")
+            return False
+        
+        info.setdefault('epoch', int(time.time()))
+        # Entries wait in the queue; keep only what their download needs
+        job = self.make_job(info.get('webpage_url') or entry_url, trim_info(info))
+        job.timings.add('extract', time.monotonic() - started)
+        job.title = info.get('title') or entry_url
+        job.batch = self.title
+        job.on_state_change = self._on_job_state
+        if self.download_queue.submit(job) is not job:
+            # Reached through a different URL shape; the queued job covers it
+            self.skipped += 1
+            return False
+        self.queued += 1
+        return True
+    
+    def _on_job_state(self, job):
+        if job.state != DownloadJob.QUEUED:
+            # The entry left the queue; let the next one be extracted
+            job.on_state_change = None
+            self._slots.release()
+    
+    def _log(self, message, message_type):
+        if self.on_log:
+            self.on_log(message, message_type)
@@ -0,0 +1,122 @@
+"""FFmpeg post-processing, run apart from the download slots"""
+import os
+import threading
+from collections import deque
+import yt_dlp as youtube_dl
+
+from .utils import QuietLogger
+
+# FFmpeg jobs run at once; merges and audio extraction are CPU bound
+DEFAULT_PROCESSORS = max(1, (os.cpu_count() or 2) // 2)
+
+class DeferredYoutubeDL(youtube_dl.YoutubeDL):
+    """YoutubeDL that stops after downloading and leaves post-processing for later
+    
+    process_info() hands each downloaded file to post_process(), which
+    here only records it; run_post_processing() then runs the merger,
+    fixups, audio extraction and the final file moves, on any thread.
+    
+    Instances are reused from job to job: configure() applies a job's
+    options and hooks to the instance as built, and reset() drops them.
+    """
+    def __init__(self, params=None, auto_init=True):
+        super().__init__(params, auto_init)
+        self.deferred = []
+        self.output_files = []  # Final paths of the post-processed files
+    
+    def configure(self, params, progress_hooks=(), postprocessor_hooks=()):
+        """Apply one job's params and hooks without rebuilding the instance"""
+        self.params.update(params)
+        self._parse_outtmpl()
+        if 'format' in params:
+            self.format_selector = self.build_format_selector(params['format']) if params['format'] else None
+        self._progress_hooks[:] = progress_hooks
+        self._postprocessor_hooks[:] = postprocessor_hooks
+        # Postprocessors copy the hooks when they are added; the per-file ones are added later
+        for pps in self._pps.values():
+            for pp in pps:
+                pp._progress_hooks[:] = postprocessor_hooks
+    
+    def reset(self):
+        """Forget the last job before the instance is reused"""
+        self.configure({'logger': QuietLogger()})
+        self._pps['before_dl'].clear()
+        self.deferred.clear()
+        self.output_files.clear()
+    
+    def post_process(self, filename, info, files_to_move=None):
+        info['filepath'] = filename
+        # yt-dlp trims the info dict after this returns; keep a copy
+        self.deferred.append((filename, dict(info), files_to_move))
+        return info
+    
+    def needs_ffmpeg(self):
+        """Check whether the deferred work includes more than moving files"""
+        return bool(self._pps['post_process']) or any(info.get('__postprocessors') for _, info, _ in self.deferred)
+    
+    def post_process_steps(self):
+        """Number of postprocessors the deferred work runs"""
+        fixed = len(self._pps['post_process']) + 1 + len(self._pps['after_move'])  # +1 moving the files
+        return sum(len(info.get('__postprocessors') or []) + fixed for _, info, _ in self.deferred)
+    
+    def run_post_processing(self):
+        """Run the deferred post-processing; returns the final info of the last file, or None
+        
+        The final path of every file, after merging, conversion and moving,
+        is collected in output_files.
+        """
+        info = None
+        while self.deferred:
+            filename, info, files_to_move = self.deferred.pop(0)
+            info = super().post_process(filename, info, files_to_move)
+            self.output_files.append(info.get('filepath') or filename)
+        return info
+
+class BeforeDownloadPP(youtube_dl.postprocessor.PostProcessor):
+    """Runs check(info) once yt-dlp has selected the formats, before anything is downloaded"""
+    def __init__(self, check, downloader=None):
+        super().__init__(downloader)
+        self.check = check
+    
+    def run(self, info):
+        self.check(info)
+        return [], info
+    
+    def _hook_progress(self, status, info_dict):
+        # Not a processing step; the job's postprocessor hooks would time it as one
+        pass
+
+class PostProcessPool:
+    """Bounded worker pool for post-processing tasks, sized apart from the download queue"""
+    def __init__(self, max_workers=DEFAULT_PROCESSORS):
+        self.max_workers = max(1, int(max_workers))
+        self._pending = deque()
+        self._workers = 0
+        self._lock = threading.Lock()
+    
+    def submit(self, task):
+        """Run task() as soon as a worker is free; task handles its own errors"""
+        with self._lock:
+            self._pending.append(task)
+            self._spawn_workers()
+    
+    def set_max_workers(self, max_workers):
+        """Resize the pool; extra workers retire after their current task"""
+        with self._lock:
+            self.max_workers = max(1, int(max_workers))
+            self._spawn_workers()
+    
+    def _spawn_workers(self):
+        # Caller must hold the lock
+        while self._pending and self._workers < self.max_workers:
+            self._workers += 1
+            threading.Thread(target=self._worker, daemon=True).start()
+    
+    def _worker(self):
+        while True:
+            with self._lock:
+                if not self._pending or self._workers > self.max_workers:
+                    self._workers -= 1
+                    return
+                task = self._pending.popleft()
+            task()
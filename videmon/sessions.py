@@ -0,0 +1,121 @@
+"""Long-lived YoutubeDL instances shared by metadata fetches and downloads"""
+import time
+import threading
+import contextlib
+import yt_dlp as youtube_dl
+
+from .postprocess import DeferredYoutubeDL
+from .utils import InfoYoutubeDL, QuietLogger
+
+# Idle instances kept per profile; one per download slot covers the usual load
+IDLE_SESSIONS = 4
+# Seconds an idle instance keeps its connections before it is closed
+IDLE_TIMEOUT = 5 * 60
+
+# Option profile -> (YoutubeDL class, options every instance is built with)
+PROFILES = {
+    # Single videos, with every format listed before selection
+    'info': (InfoYoutubeDL, {
+        'quiet': True,
+        'no_warnings': True,
+        'extract_flat': 'in_playlist',
+        'noplaylist': True,
+        'listformats': True,
+    }),
+    # Playlist pages, then each entry with its formats selected
+    'playlist': (youtube_dl.YoutubeDL, {
+        'quiet': True,
+        'no_warnings': True,
+        'extract_flat': 'in_playlist',
+    }),
+    # Downloads; DeferredYoutubeDL.configure() applies each job's own options
+    'download': (DeferredYoutubeDL, {
+        'quiet': True,
+        'no_warnings': True,
+        'noprogress': True,
+        'noplaylist': True,
+    }),
+    'download-mp3': (DeferredYoutubeDL, {
+        'format': 'bestaudio/best',
+        'postprocessors': [{
+            'key': 'FFmpegExtractAudio',
+            'preferredcodec': 'mp3',
+            'preferredquality': '192',
+        }],
+        'quiet': True,
+        'no_warnings': True,
+        'noprogress': True,
+        'noplaylist': True,
+    }),
+}
+
+class SessionPool:
+    """YoutubeDL instances kept open between uses, per option profile
+    
+    An instance keeps its request handlers, and with them its cookie jar
+    and (when yt-dlp uses requests) its keep-alive connections, as well as
+    its extractor instances, so the next fetch or download from the same
+    site skips connection and extractor setup. YoutubeDL is not
+    thread-safe: an instance belongs to one caller from acquire() to
+    release(), and a new one is built whenever all of a profile's
+    instances are out. Instances with per-use state define reset(), which
+    runs before they go back to the pool.
+    """
+    def __init__(self, profiles=PROFILES, max_idle=IDLE_SESSIONS, idle_timeout=IDLE_TIMEOUT):
+        self.profiles = profiles
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self._idle = {name: [] for name in profiles}  # profile -> [(released at, ydl)], oldest first
+        self._in_use = {}  # ydl -> profile
+        self._lock = threading.Lock()
+        self._closed = False
+    
+    def acquire(self, profile):
+        """Check out an instance of a profile, building one if none is idle"""
+        with self._lock:
+            idle = self._idle[profile]
+            cutoff = time.monotonic() - self.idle_timeout
+            expired = []
+            while idle and idle[0][0] < cutoff:
+                expired.append(idle.pop(0)[1])
+            ydl = idle.pop()[1] if idle else None
+        
+        for stale in expired:
+            stale.close()
+        if ydl is None:
+            cls, options = self.profiles[profile]
+            ydl = cls(dict(options, logger=QuietLogger()))
+        
+        with self._lock:
+            self._in_use[ydl] = profile
+        return ydl
+    
+    def release(self, ydl):
+        """Return a checked-out instance; it is closed instead if the pool is full or closed"""
+        reset = getattr(ydl, 'reset', None)
+        if reset:
+            reset()
+        with self._lock:
+            idle = self._idle[self._in_use.pop(ydl)]
+            if not self._closed and len(idle) < self.max_idle:
+                idle.append((time.monotonic(), ydl))
+                return
+        ydl.close()
+    
+    @contextlib.contextmanager
+    def session(self, profile):
+        ydl = self.acquire(profile)
+        try:
+            yield ydl
+        finally:
+            self.release(ydl)
+    
+    def close(self):
+        """Close the idle instances; those still out are closed when released"""
+        with self._lock:
+            self._closed = True
+            idle = [ydl for sessions in self._idle.values() for _, ydl in sessions]
+            for sessions in self._idle.values():
+                sessions.clear()
+        for ydl in idle:
+            ydl.close()
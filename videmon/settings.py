@@ -0,0 +1,30 @@
+"""Persisted user settings"""
+import os
+import json
+
+SETTINGS_FILE = 'videmon_settings.json'
+
+DEFAULT_SETTINGS = {
+    'path': 'VideMon_Downloads',
+    'concurrent': '1',
+    'retry': '3'
+}
+
+def load_settings(path=SETTINGS_FILE):
+    """Load settings from file, falling back to the defaults"""
+    settings = dict(DEFAULT_SETTINGS)
+    try:
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                settings = json.load(f)
+    except:
+        pass
+    return settings
+
+def save_settings(settings, path=SETTINGS_FILE):
+    """Save settings to file"""
+    try:
+        with open(path, 'w') as f:
+            json.dump(settings, f)
+    except:
+        pass
@@ -0,0 +1,247 @@
+"""Disk space: the download folder index, free-space reservations and preallocation"""
+import os
+import sys
+import json
+import ctypes
+import shutil
+import functools
+import threading
+
+FOLDER_INDEX_FILE = 'videmon_folder_index.json'
+# Bumped when the stored layout changes; an index in another layout is rebuilt
+FOLDER_INDEX_VERSION = 3
+
+# Free space left untouched by downloads, for the OS and other apps
+MIN_FREE_SPACE = 64 * 1024 * 1024
+# Slack on size estimates for container overhead and approximate sizes
+SIZE_MARGIN = 1.05
+# Bitrate of MP3 conversions in kbps, as in the FFmpegExtractAudio options
+MP3_BITRATE = 192
+
+FALLOC_FL_KEEP_SIZE = 0x01
+
+class InsufficientSpaceError(OSError):
+    """A download needs more space than the filesystem has free"""
+
+def format_size_estimate(fmt, duration):
+    """Bytes of one format: its exact or approximate size, else bitrate times duration"""
+    size = fmt.get('filesize') or fmt.get('filesize_approx')
+    if not size and fmt.get('tbr') and duration:
+        size = fmt['tbr'] * 1000 / 8 * duration
+    return int(size or 0)
+
+def estimate_output_size(info, output_format):
+    """Peak disk use of downloading and post-processing an info dict whose formats are selected"""
+    duration = info.get('duration') or 0
+    parts = info.get('requested_formats') or [info]
+    downloaded = sum(format_size_estimate(fmt, duration) for fmt in parts)
+    
+    peak = downloaded
+    if len(parts) > 1:
+        # The merged file is written before the parts are deleted
+        peak += downloaded
+    if output_format == 'mp3':
+        peak += MP3_BITRATE * 1000 / 8 * duration
+    return int(peak * SIZE_MARGIN)
+
+@functools.lru_cache(maxsize=None)
+def _fallocate():
+    if not sys.platform.startswith(('linux', 'android')):
+        return None
+    try:
+        fallocate = ctypes.CDLL(None, use_errno=True).fallocate
+    except (OSError, AttributeError):
+        return None
+    fallocate.argtypes = (ctypes.c_int, ctypes.c_int, ctypes.c_int64, ctypes.c_int64)
+    return fallocate
+
+def preallocate(path, size):
+    """Allocate disk blocks for a file being written, without changing its size
+    
+    yt-dlp resumes from the size of the .part file, so the size must stay
+    what has been written. Returns False where the platform or the
+    filesystem can't do it.
+    """
+    fallocate = _fallocate()
+    if fallocate is None:
+        return False
+    try:
+        fd = os.open(path, os.O_WRONLY)
+    except OSError:
+        return False
+    try:
+        return fallocate(fd, FALLOC_FL_KEEP_SIZE, 0, size) == 0
+    finally:
+        os.close(fd)
+
+class SpaceBudget:
+    """Disk space promised to running jobs
+    
+    Each job reserves its estimated peak use before it downloads. What a
+    job has written so far no longer counts against the others, since it
+    already shows in the free space.
+    """
+    def __init__(self, min_free=MIN_FREE_SPACE):
+        self.min_free = min_free
+        self._reserved = {}  # job -> bytes
+        self._changed = threading.Condition()
+    
+    def reserve(self, job, path, size):
+        """Reserve size bytes for a job writing to path; returns False if it must wait for other jobs
+        
+        Raises InsufficientSpaceError if the job won't fit even once every
+        other reservation is used up.
+        """
+        free = shutil.disk_usage(path).free - self.min_free
+        with self._changed:
+            needed = max(0, size - self._written(job))
+            if needed > free:
+                raise InsufficientSpaceError(
+                    f"Not enough free space: needs {needed / (1024 * 1024):.0f} MB, "
+                    f"{max(free, 0) / (1024 * 1024):.0f} MB free"
+                )
+            outstanding = sum(max(0, reserved - self._written(other))
+                              for other, reserved in self._reserved.items() if other is not job)
+            if needed > free - outstanding:
+                return False
+            self._reserved[job] = size
+            return True
+    
+    def release(self, job):
+        with self._changed:
+            if self._reserved.pop(job, None) is not None:
+                self._changed.notify_all()
+    
+    def wait(self, timeout):
+        """Block until a reservation is released or timeout seconds pass"""
+        with self._changed:
+            self._changed.wait(timeout)
+    
+    @staticmethod
+    def _written(job):
+        return job.transferred_bytes + job.downloaded_bytes
+
+class FolderIndex:
+    """File sizes under a folder, kept up to date without rescanning it
+    
+    Each directory is stored with its mtime, which changes whenever an
+    entry is added, removed or renamed in it, and each file with its size
+    and mtime. refresh() only lists the directories whose mtime moved; in
+    the others it stats the files it already knows, and takes a new size
+    only from a file whose own mtime moved, which catches files rewritten
+    in place. Nothing is opened or read, and the index is only saved when
+    something changed. Files written by the app are added as they finish,
+    so the totals are right between refreshes too.
+    """
+    def __init__(self, root, path=FOLDER_INDEX_FILE):
+        self.root = os.path.abspath(root)
+        self.path = path
+        self.count = 0
+        self.total_bytes = 0
+        # directory relative to root -> {'mtime', 'files': {name: [size, mtime_ns]}, 'dirs': [names]}
+        self._dirs = {}
+        self._lock = threading.Lock()
+        self._load()
+    
+    def refresh(self):
+        """Bring the index up to date with the folder; returns the total bytes"""
+        with self._lock:
+            dirs = {}
+            self._scan('', dirs)
+            if dirs != self._dirs:
+                self._dirs = dirs
+                self._recount()
+                self._save()
+            return self.total_bytes
+    
+    def add(self, paths):
+        """Record files just written under the folder"""
+        with self._lock:
+            for path in paths:
+                relative = os.path.relpath(os.path.abspath(path), self.root)
+                if relative.startswith(os.pardir):
+                    continue
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                directory, name = os.path.split(relative)
+                self._directory(directory)['files'][name] = [stat.st_size, stat.st_mtime_ns]
+            self._recount()
+            self._save()
+    
+    def _directory(self, relative):
+        # Caller must hold the lock; the folder or a subfolder may have been created after the last refresh
+        entry = self._dirs.get(relative)
+        if entry is None:
+            # No mtime, so the next refresh lists it
+            entry = self._dirs[relative] = {'mtime': None, 'files': {}, 'dirs': []}
+            if relative:
+                parent, name = os.path.split(relative)
+                siblings = self._directory(parent)['dirs']
+                if name not in siblings:
+                    siblings.append(name)
+        return entry
+    
+    def _scan(self, relative, dirs):
+        # Caller must hold the lock
+        directory = os.path.join(self.root, relative)
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            return
+        
+        cached = self._dirs.get(relative)
+        if cached is not None and cached['mtime'] == mtime:
+            # Same entries as last time; only a file rewritten in place can have a new size
+            entry = {'mtime': mtime, 'files': {}, 'dirs': cached['dirs']}
+            prefix = os.path.join(directory, '')  # Cheaper than os.path.join per file
+            for name, known in cached['files'].items():
+                try:
+                    stat = os.lstat(prefix + name)
+                except OSError:
+                    continue
+                entry['files'][name] = known if stat.st_mtime_ns == known[1] else [stat.st_size, stat.st_mtime_ns]
+        else:
+            entry = {'mtime': mtime, 'files': {}, 'dirs': []}
+            try:
+                with os.scandir(directory) as entries:
+                    for dir_entry in entries:
+                        try:
+                            if dir_entry.is_dir(follow_symlinks=False):
+                                entry['dirs'].append(dir_entry.name)
+                            elif dir_entry.is_file(follow_symlinks=False):
+                                stat = dir_entry.stat(follow_symlinks=False)
+                                entry['files'][dir_entry.name] = [stat.st_size, stat.st_mtime_ns]
+                        except OSError:
+                            pass
+            except OSError:
+                return
+        
+        dirs[relative] = entry
+        for name in entry['dirs']:
+            self._scan(os.path.join(relative, name), dirs)
+    
+    def _recount(self):
+        # Caller must hold the lock
+        self.count = sum(len(entry['files']) for entry in self._dirs.values())
+        self.total_bytes = sum(size for entry in self._dirs.values() for size, _ in entry['files'].values())
+    
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return
+        if index.get('root') == self.root and index.get('version') == FOLDER_INDEX_VERSION:
+            self._dirs = index.get('dirs') or {}
+            self._recount()
+    
+    def _save(self):
+        # Caller must hold the lock
+        try:
+            with open(self.path + '.tmp', 'w') as f:
+                json.dump({'version': FOLDER_INDEX_VERSION, 'root': self.root, 'dirs': self._dirs}, f)
+            os.replace(self.path + '.tmp', self.path)
+        except OSError:
+            pass
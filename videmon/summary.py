@@ -0,0 +1,81 @@
+"""Compact video summaries built from yt-dlp info dicts"""
+from .formats import FormatRecord
+
+# Characters of the description kept for display
+DESCRIPTION_LENGTH = 200
+
+class VideoSummary:
+    """What the app shows and selects from for one video, without the info dict
+    
+    The formats are FormatRecords sorted by quality, best first. to_dict()
+    is the form stored in the metadata cache.
+    """
+    __slots__ = ('title', 'duration', 'uploader', 'views', 'thumbnail', 'description', 'url', 'formats')
+    
+    def __init__(self, title, duration=0, uploader='Unknown', views=0, thumbnail='', description='',
+                 url='', formats=()):
+        self.title = title
+        self.duration = duration
+        self.uploader = uploader
+        self.views = views
+        self.thumbnail = thumbnail
+        self.description = description
+        self.url = url
+        self.formats = tuple(formats)
+    
+    @classmethod
+    def from_info(cls, info, url):
+        """Summarize an extracted info dict; nothing of the dict is kept"""
+        description = info.get('description') or ''
+        formats = sorted(
+            (FormatRecord(fmt) for fmt in info.get('formats') or []),
+            key=lambda record: record.short_side,
+            reverse=True
+        )
+        return cls(
+            info.get('title') or 'Unknown Video',
+            info.get('duration') or 0,
+            info.get('uploader') or 'Unknown',
+            info.get('view_count') or 0,
+            info.get('thumbnail') or '',
+            description[:DESCRIPTION_LENGTH] + ('...' if len(description) > DESCRIPTION_LENGTH else ''),
+            info.get('webpage_url') or url,
+            cls._numbered(formats)
+        )
+    
+    @classmethod
+    def from_dict(cls, entry):
+        """Rebuild a summary from its cached form"""
+        video_info = entry['video_info']
+        return cls(
+            video_info.get('title') or 'Unknown Video',
+            video_info.get('duration') or 0,
+            video_info.get('uploader') or 'Unknown',
+            video_info.get('views') or 0,
+            video_info.get('thumbnail') or '',
+            video_info.get('description') or '',
+            video_info.get('url') or '',
+            cls._numbered(FormatRecord(fmt) for fmt in entry.get('qualities') or [])
+        )
+    
+    def to_dict(self):
+        return {
+            'video_info': {
+                'title': self.title,
+                'duration': self.duration,
+                'uploader': self.uploader,
+                'views': self.views,
+                'thumbnail': self.thumbnail,
+                'description': self.description,
+                'url': self.url
+            },
+            'qualities': [record.to_dict() for record in self.formats]
+        }
+    
+    @staticmethod
+    def _numbered(records):
+        # Record indexes are positions in the summary's format list
+        records = list(records)
+        for index, record in enumerate(records):
+            record.index = index
+        return records
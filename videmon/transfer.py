@@ -0,0 +1,120 @@
+"""Shared limits on connections and bandwidth, and progress merging"""
+import time
+import threading
+
+# Fragment downloads (DASH/HLS); open connections are capped across all jobs
+DEFAULT_FRAGMENTS = '4'
+MAX_CONNECTIONS = 16
+
+# Bandwidth governor
+BANDWIDTH_BURST = 1.0      # seconds of transfer a job may burst above its share
+BANDWIDTH_MAX_SLEEP = 1.0  # longest single throttle pause, so limit changes apply quickly
+
+# Progress updates published per second (settings key 'progress_rate')
+PROGRESS_RATE = 10
+
+class ConnectionBudget:
+    """Global cap on fragment connections shared by all running jobs"""
+    def __init__(self, limit=MAX_CONNECTIONS):
+        self.limit = limit
+        self._in_use = 0
+        self._lock = threading.Lock()
+    
+    def acquire(self, wanted, workers):
+        """Grant up to `wanted` connections, at most a fair share for `workers` jobs"""
+        with self._lock:
+            share = max(1, self.limit // max(1, workers))
+            granted = max(1, min(wanted, share, self.limit - self._in_use))
+            self._in_use += granted
+            return granted
+    
+    def release(self, granted):
+        with self._lock:
+            self._in_use -= granted
+
+class BandwidthGovernor:
+    """Token-bucket rate limiter shared by all running downloads
+    
+    The total limit is split between registered jobs by weight, and each
+    job draws from its own bucket refilled at that share. Jobs are slowed
+    down by sleeping in their progress hook, so the limit can be changed
+    at any time without restarting downloads.
+    """
+    def __init__(self, limit=0):
+        self.limit = limit  # bytes per second, 0 for unlimited
+        self._jobs = {}
+        self._total_weight = 0
+        self._lock = threading.Lock()
+    
+    def set_limit(self, limit):
+        with self._lock:
+            self.limit = limit
+            for bucket in self._jobs.values():
+                bucket['tokens'] = min(bucket['tokens'], 0)
+    
+    def register(self, job_id, weight=1):
+        with self._lock:
+            self._jobs[job_id] = {
+                'weight': weight,
+                'tokens': 0.0,
+                'refilled': time.monotonic(),
+                'file': None,
+                'bytes': 0
+            }
+            self._total_weight += weight
+    
+    def set_weight(self, job_id, weight):
+        with self._lock:
+            bucket = self._jobs.get(job_id)
+            if bucket:
+                self._total_weight += weight - bucket['weight']
+                bucket['weight'] = weight
+    
+    def unregister(self, job_id):
+        with self._lock:
+            bucket = self._jobs.pop(job_id, None)
+            if bucket:
+                self._total_weight -= bucket['weight']
+    
+    def throttle(self, job_id, filename, downloaded_bytes):
+        """Charge a job for the bytes downloaded since its last call and pause while it is over budget"""
+        with self._lock:
+            bucket = self._jobs.get(job_id)
+            if bucket is None:
+                return
+            
+            # Byte counts restart for every file of a job (e.g. video then audio)
+            if filename != bucket['file']:
+                bucket['file'] = filename
+                bucket['bytes'] = 0
+            spent = max(0, downloaded_bytes - bucket['bytes'])
+            bucket['bytes'] = max(bucket['bytes'], downloaded_bytes)
+            
+            now = time.monotonic()
+            elapsed = now - bucket['refilled']
+            bucket['refilled'] = now
+            if not self.limit:
+                return
+            
+            rate = self.limit * bucket['weight'] / self._total_weight
+            bucket['tokens'] = min(bucket['tokens'] + elapsed * rate, rate * BANDWIDTH_BURST) - spent
+            delay = -bucket['tokens'] / rate if bucket['tokens'] < 0 else 0
+        
+        if delay:
+            time.sleep(min(delay, BANDWIDTH_MAX_SLEEP))
+
+class ProgressAggregator:
+    """Merges per-chunk progress callbacks per job until the UI drains them"""
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+    
+    def update(self, job_id, **fields):
+        with self._lock:
+            self._pending.setdefault(job_id, {}).update(fields)
+    
+    def drain(self):
+        """Return and reset the updates merged since the last drain"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
@@ -0,0 +1,97 @@
+"""URL and info dict helpers"""
+import re
+import time
+from urllib.parse import urlparse, parse_qs
+import yt_dlp as youtube_dl
+
+# Extracted info is reused for downloading while its stream URLs stay valid
+STREAM_URL_MARGIN = 5 * 60    # seconds a stream URL must still be valid for
+STREAM_URL_MAX_AGE = 30 * 60  # fallback when the URLs carry no expiry
+
+def stream_urls_expired(info):
+    """Check whether the stream URLs in an extracted info dict are (nearly) expired"""
+    expiries = []
+    for fmt in info.get('formats') or []:
+        match = re.search(r'[?&]expire=(\d+)', fmt.get('url') or '')
+        if match:
+            expiries.append(int(match.group(1)))
+    
+    if expiries:
+        return min(expiries) - time.time() < STREAM_URL_MARGIN
+    return time.time() - info.get('epoch', 0) > STREAM_URL_MAX_AGE
+
+# Info dict fields a download never reads; subtitle and caption tables alone can be megabytes
+UNRETAINED_INFO_FIELDS = ('automatic_captions', 'subtitles', 'requested_subtitles', 'thumbnails', 'description',
+                          'heatmap', 'comments', 'tags', 'categories', 'chapters')
+
+def trim_info(info):
+    """Copy of an info dict with only what downloading it again needs"""
+    trimmed = {key: value for key, value in info.items() if key not in UNRETAINED_INFO_FIELDS}
+    # Storyboard images are listed as formats, each with its own fragment list
+    if info.get('formats'):
+        trimmed['formats'] = [fmt for fmt in info['formats'] if fmt.get('ext') != 'mhtml']
+    return trimmed
+
+YOUTUBE_ID_RE = re.compile(r'^[A-Za-z0-9_-]{11}$')
+
+def canonical_video_id(url):
+    """Return the YouTube video ID for any supported URL shape, or None"""
+    try:
+        parsed = urlparse(url if '://' in url else f'https://{url}')
+    except ValueError:
+        return None
+    
+    host = (parsed.hostname or '').lower()
+    parts = [p for p in parsed.path.split('/') if p]
+    candidate = None
+    
+    if host == 'youtu.be' or host.endswith('.youtu.be'):
+        candidate = parts[0] if parts else None
+    elif host == 'youtube.com' or host.endswith('.youtube.com'):
+        if parts[:1] == ['watch']:
+            candidate = parse_qs(parsed.query).get('v', [None])[0]
+        elif len(parts) >= 2 and parts[0] in ('shorts', 'embed', 'live', 'v'):
+            candidate = parts[1]
+    
+    if candidate and YOUTUBE_ID_RE.match(candidate):
+        return candidate
+    return None
+
+def is_playlist_url(url):
+    """Check whether a YouTube URL refers to a playlist"""
+    try:
+        parsed = urlparse(url if '://' in url else f'https://{url}')
+    except ValueError:
+        return False
+    return 'list' in parse_qs(parsed.query) or parsed.path.rstrip('/') == '/playlist'
+
+class QuietLogger:
+    """yt-dlp logger that drops all output; errors still raise DownloadError"""
+    def debug(self, message):
+        pass
+    
+    info = warning = error = debug
+
+class InfoYoutubeDL(youtube_dl.YoutubeDL):
+    """YoutubeDL for listformats extraction without printing the format table
+    
+    listformats makes extract_info() return every format before any
+    format selection; the table it prints is not wanted.
+    """
+    def list_formats(self, info_dict):
+        pass
+
+def read_urls(lines):
+    """Yield the URLs in lines of text, skipping blank lines and # comments"""
+    for line in lines:
+        if line.lstrip().startswith('#'):
+            continue
+        yield from line.split()
+
+def split_urls(text):
+    """Return the newline- or space-separated URLs in pasted text, without repeats"""
+    return list(dict.fromkeys(read_urls(text.splitlines())))
+
+def video_key(url):
+    """Key that identifies the same video across URL shapes"""
+    return canonical_video_id(url) or url.strip()